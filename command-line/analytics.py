@@ -0,0 +1,191 @@
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from archive import day_columns
+from orderstore import MONTHS, day_rollup, day_signature
+
+# Reports and charts are cached under the working directory, keyed by a
+# fingerprint of the selected days, so opening the same dashboard twice
+# neither re-reads orders nor re-plots.
+CACHE_DIR = "analytics_cache"
+MAX_CACHED_REPORTS = 20
+CHARTS = ("top_items", "revenue_by_hour", "revenue_by_weekday", "basket_size")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def day_weekday(date, month, today=None):
+    """
+    Return the weekday (0 = Monday) of a saved day, or -1 if it is not a real date.
+
+    Day files carry no year, so a day is taken to be its most recent
+    occurrence: a date later in the year than today belongs to last year.
+    """
+    today = today or datetime.date.today()
+    month_number = MONTHS.index(month) + 1
+    year = today.year if (month_number, int(date)) <= (today.month, today.day) else today.year - 1
+    try:
+        return datetime.date(year, month_number, int(date)).weekday()
+    except ValueError:
+        return -1
+
+
+def fingerprint(days, today=None):
+    """
+    Identify the data of the selected days without reading orders: their
+    rollups, the mtime and size of their files (which also change when
+    orders change in ways the rollups do not count, e.g. basket contents),
+    and today's date, which decides the weekday of every day.
+    """
+    digest = hashlib.sha1()
+    digest.update(str(today or datetime.date.today()).encode())
+    for month, date in days:
+        digest.update(json.dumps([month, str(date), day_rollup(date, month).to_dict(),
+                                  day_signature(date, month)], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_frame(days):
+    """
+    Flatten the orders of the given days into one long-format DataFrame.
+
+    There is one row per ordered item: order (unique across the days),
+    day, hour (-1 if unknown), weekday, item, quantity and revenue. A CLI
+    order counts as one of its free text item at the full bill.
+    """
+    # pandas and matplotlib are imported on a cache miss only
+    import pandas as pd
+    frames = []
+    orders_so_far = 0
+    for month, date in days:
+        columns = day_columns(date, month)
+        counts = np.diff(columns.item_offsets)
+        hours = np.where(columns.time >= 0, columns.time // 3600, -1)
+        items = np.array(columns.items, dtype=object)
+        frames.append(pd.DataFrame({
+            "order": np.repeat(np.arange(len(columns)) + orders_so_far, counts),
+            "day": f"{date} {month}",
+            "hour": np.repeat(hours, counts),
+            "weekday": day_weekday(date, month),
+            "item": items[np.asarray(columns.item_code)] if len(items) else np.array([], dtype=object),
+            "quantity": np.asarray(columns.item_qty),
+            "revenue": np.asarray(columns.item_qty) * np.asarray(columns.item_price),
+        }))
+        orders_so_far += len(columns)
+    if not frames:
+        return pd.DataFrame(columns=["order", "day", "hour", "weekday", "item", "quantity", "revenue"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def analyse(frame, top=10):
+    """Run the dashboard groupbys on a long-format frame; returns plain JSON-able data."""
+    top_items = (frame.groupby("item")[["quantity", "revenue"]].sum()
+                 .sort_values(["quantity", "revenue"], ascending=False).head(top))
+    by_hour = (frame[frame["hour"] >= 0].groupby("hour")["revenue"].sum()
+               .reindex(range(24), fill_value=0.0))
+    by_weekday = (frame[frame["weekday"] >= 0].groupby("weekday")["revenue"].sum()
+                  .reindex(range(7), fill_value=0.0))
+    basket = frame.groupby("order")["quantity"].sum().value_counts().sort_index()
+    return {
+        "orders": int(frame["order"].nunique()),
+        "revenue": round(float(frame["revenue"].sum()), 2),
+        "top_items": [[item, int(row.quantity), round(float(row.revenue), 2)]
+                      for item, row in top_items.iterrows()],
+        "revenue_by_hour": [round(float(value), 2) for value in by_hour],
+        "revenue_by_weekday": [round(float(value), 2) for value in by_weekday],
+        "basket_size": [[int(size), int(count)] for size, count in basket.items()],
+    }
+
+
+def render_chart(name, report, filename):
+    """Plot one chart of a report to a PNG file."""
+    # The object-oriented API needs no GUI backend, so this is safe to call
+    # from the CLI and from inside the Kivy app
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=(6, 3.5), dpi=100)
+    axes = figure.add_subplot()
+    if name == "top_items":
+        items = report["top_items"][::-1]
+        axes.barh([item for item, _, _ in items], [quantity for _, quantity, _ in items], color="#c8814a")
+        axes.set_title("Top items")
+        axes.set_xlabel("Quantity sold")
+    elif name == "revenue_by_hour":
+        axes.bar(range(24), report["revenue_by_hour"], color="#4a7fc8")
+        axes.set_title("Revenue by hour")
+        axes.set_xlabel("Hour")
+        axes.set_ylabel("Revenue ($)")
+        axes.set_xticks(range(0, 24, 2))
+    elif name == "revenue_by_weekday":
+        axes.bar(WEEKDAYS, report["revenue_by_weekday"], color="#4ac87f")
+        axes.set_title("Revenue by weekday")
+        axes.set_ylabel("Revenue ($)")
+    elif name == "basket_size":
+        sizes = report["basket_size"]
+        axes.bar([size for size, _ in sizes], [count for _, count in sizes], color="#a04ac8")
+        axes.set_title("Basket size")
+        axes.set_xlabel("Items per order")
+        axes.set_ylabel("Orders")
+    figure.tight_layout()
+    figure.savefig(filename, format="png")
+
+
+def _prune_cache(cache_dir):
+    reports = sorted((entry for entry in os.scandir(cache_dir) if entry.name.endswith(".json")),
+                     key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in reports[MAX_CACHED_REPORTS:]:
+        key = entry.name[:-len(".json")]
+        for name in CHARTS:
+            try:
+                os.remove(os.path.join(cache_dir, f"{key}-{name}.png"))
+            except OSError:
+                pass
+        os.remove(entry.path)
+
+
+def sales_report(days, top=10, cache_dir=CACHE_DIR):
+    """
+    Return (report, {chart name: PNG path}) for the given (month, date) days.
+
+    Results are cached by the fingerprint of the days' data; the orders are
+    only flattened and the charts only plotted when that data changed.
+    """
+    key = f"{fingerprint(days)[:20]}-top{top}"
+    report_file = os.path.join(cache_dir, f"{key}.json")
+    charts = {name: os.path.join(cache_dir, f"{key}-{name}.png") for name in CHARTS}
+    if os.path.exists(report_file) and all(os.path.exists(path) for path in charts.values()):
+        with open(report_file, 'r') as file:
+            return json.load(file), charts
+
+    report = analyse(load_frame(days), top)
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, path in charts.items():
+        render_chart(name, report, path + ".tmp")
+        os.replace(path + ".tmp", path)
+    # The report goes last: its presence marks a complete cache entry
+    with open(report_file + ".tmp", 'w') as file:
+        json.dump(report, file)
+    os.replace(report_file + ".tmp", report_file)
+    _prune_cache(cache_dir)
+    return report, charts
+
+
+def report_lines(report):
+    """Return a report as printable text lines."""
+    lines = [f"Total Orders: {report['orders']}", f"Total Revenue: ${report['revenue']:.2f}",
+             "", "Top items             Quantity    Revenue"]
+    for item, quantity, revenue in report["top_items"]:
+        lines.append(f"{item[:20]:20}  {quantity:8d}  ${revenue:9.2f}")
+    lines += ["", "Hour   Revenue"]
+    for hour, revenue in enumerate(report["revenue_by_hour"]):
+        if revenue:
+            lines.append(f"{hour:02d}:00  ${revenue:9.2f}")
+    lines += ["", "Day    Revenue"]
+    for day, revenue in zip(WEEKDAYS, report["revenue_by_weekday"]):
+        lines.append(f"{day}    ${revenue:9.2f}")
+    lines += ["", "Basket size   Orders"]
+    for size, count in report["basket_size"]:
+        lines.append(f"{size:11d}  {count:7d}")
+    return lines
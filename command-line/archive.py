@@ -0,0 +1,228 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from orders import SCHEMA_CLI, SCHEMA_KIVY, Order, OrderItem, decode_order
+from orderstore import (ARCHIVE_EXT, JOURNAL_EXT, LEGACY_EXT, day_filename, get_store,
+                        iter_day_file, locked_append)
+
+# An archived day is a directory of fixed-width NumPy columns, one row per
+# order, plus one row per ordered item for the item columns:
+#
+#   time.npy          int32   seconds since midnight (-1 if unknown)
+#   bill.npy          float64 total bill
+#   customer.npy      int32   index into meta["customers"]
+#   customer_id.npy   int32   index into meta["customer_ids"]
+#   schema.npy        uint8   SCHEMA_CLI or SCHEMA_KIVY (see orders.py)
+#   item_offsets.npy  int64   items of order i are rows item_offsets[i]:item_offsets[i + 1]
+#   item_code.npy     int32   index into meta["items"]
+#   item_qty.npy      int32   quantity
+#   item_price.npy    float64 unit price
+#
+# Arrays are memory-mapped when read, so queries never parse JSON.
+ARCHIVE_VERSION = 1
+COLUMNS = ("time", "bill", "customer", "customer_id", "schema",
+           "item_offsets", "item_code", "item_qty", "item_price")
+
+
+def parse_seconds(order_time):
+    try:
+        hours, minutes, seconds = (int(part) for part in str(order_time).split(":"))
+        return hours * 3600 + minutes * 60 + seconds
+    except ValueError:
+        return -1
+
+
+class DayColumns:
+    """Columns of one day, either memory-mapped from an archive or built from live orders."""
+
+    def __init__(self, columns, meta):
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self.customers = meta["customers"]
+        self.customer_ids = meta["customer_ids"]
+        self.items = meta["items"]
+
+    def __len__(self):
+        return len(self.bill)
+
+    @classmethod
+    def from_orders(cls, orders):
+        """Dictionary-encode orders (Orders or stored dicts) into columns."""
+        lookups = {"customers": {}, "customer_ids": {}, "items": {}}
+
+        def code(kind, value):
+            return lookups[kind].setdefault(value, len(lookups[kind]))
+
+        time, bill, customer, customer_id, schema = [], [], [], [], []
+        item_offsets, item_code, item_qty, item_price = [0], [], [], []
+        for order in orders:
+            order = decode_order(order)
+            time.append(parse_seconds(order.time))
+            customer.append(code("customers", str(order.customer_name)))
+            customer_id.append(code("customer_ids", str(order.customer_id)))
+            schema.append(order.schema)
+            bill.append(order.bill)
+            for item in order.items:
+                item_code.append(code("items", item.item))
+                item_qty.append(item.quantity)
+                item_price.append(item.price)
+            item_offsets.append(len(item_code))
+
+        columns = {
+            "time": np.array(time, dtype=np.int32),
+            "bill": np.array(bill, dtype=np.float64),
+            "customer": np.array(customer, dtype=np.int32),
+            "customer_id": np.array(customer_id, dtype=np.int32),
+            "schema": np.array(schema, dtype=np.uint8),
+            "item_offsets": np.array(item_offsets, dtype=np.int64),
+            "item_code": np.array(item_code, dtype=np.int32),
+            "item_qty": np.array(item_qty, dtype=np.int32),
+            "item_price": np.array(item_price, dtype=np.float64),
+        }
+        meta = {kind: list(values) for kind, values in lookups.items()}
+        return cls(columns, meta)
+
+    def _order(self, i, seconds, bill, schema, items, date, month):
+        order_time = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}" if seconds >= 0 else ""
+        customer_id = self.customer_ids[self.customer_id[i]]
+        if schema == SCHEMA_CLI and customer_id.isdigit():
+            customer_id = int(customer_id)
+        return Order(self.customers[self.customer[i]], customer_id, items, bill, order_time,
+                     f"{date} {month}" if schema == SCHEMA_KIVY else None, schema).to_dict()
+
+    def iter_orders(self, date, month):
+        """Yield the orders back as dicts in the layout they were saved in."""
+        offsets = self.item_offsets.tolist()
+        codes = self.item_code.tolist()
+        quantities = self.item_qty.tolist()
+        prices = self.item_price.tolist()
+        for i, (seconds, bill, schema) in enumerate(zip(self.time.tolist(), self.bill.tolist(),
+                                                        self.schema.tolist())):
+            items = tuple(OrderItem(self.items[codes[row]], quantities[row], prices[row])
+                          for row in range(offsets[i], offsets[i + 1]))
+            yield self._order(i, seconds, bill, schema, items, date, month)
+
+    def order_at(self, i, date, month):
+        """Return order ``i`` as a dict, reading only its own rows."""
+        items = tuple(OrderItem(self.items[int(self.item_code[row])], int(self.item_qty[row]),
+                                float(self.item_price[row]))
+                      for row in range(int(self.item_offsets[i]), int(self.item_offsets[i + 1])))
+        return self._order(i, int(self.time[i]), float(self.bill[i]), int(self.schema[i]), items, date, month)
+
+    def hourly_revenue(self):
+        """Revenue per hour of the day, computed on the columns."""
+        known = self.time >= 0
+        return np.bincount(self.time[known] // 3600, weights=self.bill[known], minlength=24)[:24]
+
+    def item_quantities(self):
+        """Return {item: quantity sold}, computed on the columns."""
+        totals = np.bincount(self.item_code, weights=self.item_qty, minlength=len(self.items))
+        return {item: int(total) for item, total in zip(self.items, totals)}
+
+
+def recover_archive(path):
+    """Finish or undo a replacement of an archive that was cut off by a crash."""
+    old = path + ".old"
+    if os.path.isdir(old):
+        if os.path.isdir(path):
+            shutil.rmtree(old)
+        else:
+            os.rename(old, path)
+
+
+def write_columns(columns, path):
+    """Write DayColumns to an archive directory, replacing any previous one."""
+    recover_archive(path)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name in COLUMNS:
+        np.save(os.path.join(tmp, name + ".npy"), getattr(columns, name))
+    meta = {"version": ARCHIVE_VERSION, "orders": len(columns),
+            "customers": columns.customers, "customer_ids": columns.customer_ids, "items": columns.items}
+    with open(os.path.join(tmp, "meta.json"), 'w') as file:
+        json.dump(meta, file)
+    # The previous archive stays around until the new one is in place
+    old = path + ".old"
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    if os.path.exists(old):
+        shutil.rmtree(old)
+
+
+def read_columns(path):
+    """Memory-map the columns of an archive directory."""
+    with open(os.path.join(path, "meta.json"), 'r') as file:
+        meta = json.load(file)
+    columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode='r') for name in COLUMNS}
+    return DayColumns(columns, meta)
+
+
+def iter_archive(path, date, month):
+    """Yield the orders stored in an archive directory."""
+    yield from read_columns(path).iter_orders(date, month)
+
+
+def is_archived(date, month):
+    return os.path.isdir(day_filename(date, month, ARCHIVE_EXT))
+
+
+def has_live_orders(date, month):
+    """Whether a day has orders outside its archive (an empty journal left by a lock does not count)."""
+    return any(os.path.exists(filename) and os.path.getsize(filename) > 0
+               for filename in (day_filename(date, month, LEGACY_EXT), day_filename(date, month, JOURNAL_EXT)))
+
+
+def day_columns(date, month):
+    """
+    Return the columns of a day, archived or live.
+
+    Archived days are memory-mapped; anything saved to the journal after
+    archiving, and days that are not archived at all, are encoded from the
+    live orders.
+    """
+    path = day_filename(date, month, ARCHIVE_EXT)
+    if os.path.isdir(path) and not has_live_orders(date, month):
+        return read_columns(path)
+    return DayColumns.from_orders(get_store().iter_day(date, month))
+
+
+def archive_day(date, month):
+    """
+    Move a closed day from its JSON files into a columnar archive.
+
+    Runs under the day's journal lock. The journal is removed while still
+    locked; an order saved concurrently waits for the lock and then lands
+    in a fresh journal next to the archive (see locked_append). Returns the
+    number of archived orders.
+    """
+    path = day_filename(date, month, ARCHIVE_EXT)
+    legacy = day_filename(date, month, LEGACY_EXT)
+    journal = day_filename(date, month, JOURNAL_EXT)
+    with locked_append(journal) as file:
+        recover_archive(path)
+        orders = []
+        if os.path.isdir(path):
+            orders.extend(iter_archive(path, date, month))
+        for filename in (legacy, journal):
+            if os.path.exists(filename):
+                orders.extend(iter_day_file(filename))
+        columns = DayColumns.from_orders(orders)
+        write_columns(columns, path)
+        if sum(1 for _ in iter_archive(path, date, month)) != len(orders):
+            raise RuntimeError(f"Archive check failed for {date} {month}")
+        if os.path.exists(legacy):
+            os.remove(legacy)
+        file.truncate(0)
+        try:
+            os.remove(journal)
+        except OSError:
+            # Windows can not remove an open file; an empty journal is harmless
+            pass
+        # The day's orders moved, point the lookup index at the archive
+        get_store().index_day(date, month)
+    return len(orders)
@@ -1,43 +1,49 @@
 import argparse
+import csv
+import json
+import sys
 import time
-from random import randint  
-from fpdf import FPDF
-import pandas as pd
 from os import system
-import json
 import os
+from orderids import new_order_id
+from orderstore import ARCHIVE_EXT, MONTHS, SqliteStore, DEFAULT_DB, append_order, append_orders, day_exists, find_orders, get_store, iter_orders, list_day_files, list_days, read_orders, rebuild_rollup
+from reports import RangeSummary, days_in_range, iter_range_orders, parse_day_spec, summarize_range
 
-def save_order_to_json(customer_name, customer_id, order, bill, order_time, date, month):
-    filename = f"BakeryShop{month}{date}.json"
-    order_data = {
+def build_order(customer_name, customer_id, order, bill, order_time):
+    return {
         "Customer_name": customer_name,
         "Customer_id": customer_id,
         "Order": order,
         "Bill": bill,
         "Time": order_time
     }
-    
-    if os.path.exists(filename):
-        with open(filename, 'r') as file:
-            data = json.load(file)
-    else:
-        data = []
-
-    data.append(order_data)
 
-    with open(filename, 'w') as file:
-        json.dump(data, file, indent=4)
+def save_order_to_json(customer_name, customer_id, order, bill, order_time, date, month):
+    order_data = build_order(customer_name, customer_id, order, bill, order_time)
+    append_order(order_data, date, month)
 
 def read_orders_from_json(date, month):
-    filename = f"BakeryShop{month}{date}.json"
-    if os.path.exists(filename):
-        with open(filename, 'r') as file:
-            data = json.load(file)
-        return data
+    if day_exists(date, month):
+        return read_orders(date, month)
     else:
         print("No orders found for the given date and month.")
         return []
 
+def current_order_time():
+    """Returns (order_time, date, month) for the current local time."""
+    current_time = time.asctime(time.localtime(time.time()))
+    order_time = current_time[11:19]
+    # Convert date properly if there's a leading space
+    date = current_time[8:10].strip()
+    month = current_time[4:7]
+    return order_time, date, month
+
+def validate_order(customer_name, order_text, bill):
+    """Returns an error message if the order is not valid, otherwise None."""
+    if len(customer_name) == 0 or len(order_text) == 0 or len(bill) == 0:
+        return "Please provide valid customer name, order, and bill amount."
+    return None
+
 def order_process(args):
     """
     Saves an order for the given customer.
@@ -48,54 +54,396 @@ def order_process(args):
     order_text = args.order
     bill = str(args.bill)
     
-    current_time = time.asctime(time.localtime(time.time()))
-    customer_id = randint(1000000000, 3999999999)
-    order_time = current_time[11:19]
-    testDate = current_time[8:10]
-    month = current_time[4:7]
-    
-    # Convert date properly if there's a leading space
-    if " " in testDate:
-        testDate = testDate.strip()
-    Date = testDate
+    customer_id = new_order_id()
+    order_time, Date, month = current_order_time()
     
     # Validate user input
-    if len(customer_name) == 0 or len(order_text) == 0 or len(bill) == 0:
-        print("Error: Please provide valid customer name, order, and bill amount.")
+    error = validate_order(customer_name, order_text, bill)
+    if error:
+        print(f"Error: {error}")
         return
     
     save_order_to_json(customer_name, customer_id, order_text, bill, order_time, Date, month)
     print("Order Saved Successfully")
 
+def read_import_rows(file, fmt):
+    """Yields (line number, row dict or None) from a CSV or JSONL stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_num, row if isinstance(row, dict) else None
+
+def parse_import_row(row, now):
+    """
+    Validates one imported row and returns (order_data, date, month).
+    Raises ValueError with the reason when the row is rejected.
+    """
+    if row is None:
+        raise ValueError("not a valid record")
+    customer_name = str(row.get("customer") or "").strip()
+    order_text = str(row.get("order") or "").strip()
+    try:
+        bill = str(float(row.get("bill")))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid bill amount: {row.get('bill')!r}")
+    error = validate_order(customer_name, order_text, bill)
+    if error:
+        raise ValueError(error)
+
+    order_time, date, month = now
+    if row.get("time"):
+        order_time = str(row["time"]).strip()
+        try:
+            time.strptime(order_time, "%H:%M:%S")
+        except ValueError:
+            raise ValueError(f"invalid time: {order_time!r}")
+    if row.get("date") or row.get("month"):
+        date = str(row.get("date") or "").strip().lstrip("0")
+        month = str(row.get("month") or "").strip().capitalize()
+        if month not in MONTHS or not date.isdigit() or not 1 <= int(date) <= 31:
+            raise ValueError(f"invalid date: {row.get('date')!r} {row.get('month')!r}")
+
+    customer_id = new_order_id()
+    return build_order(customer_name, customer_id, order_text, bill, order_time), date, month
+
+def import_orders(args):
+    """
+    Imports many orders at once from a CSV or JSONL file, or stdin ("-").
+    Rows need customer, order and bill; time, date and month are optional.
+    Example:
+        python bakery.py import tickets.csv --batch-size 500
+    """
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.file.lower().endswith(".csv") else "jsonl"
+    file = sys.stdin if args.file == "-" else open(args.file, 'r', newline='')
+
+    now = current_order_time()
+    start = time.perf_counter()
+    imported = 0
+    rejected = []
+    batch = []
+    try:
+        for line_num, row in read_import_rows(file, fmt):
+            try:
+                batch.append(parse_import_row(row, now))
+            except ValueError as e:
+                rejected.append((line_num, str(e)))
+                continue
+            if len(batch) >= args.batch_size:
+                append_orders(batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            append_orders(batch)
+            imported += len(batch)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+    elapsed = time.perf_counter() - start
+    rate = imported / elapsed if elapsed > 0 else 0
+    print(f"Imported {imported} orders in {elapsed:.2f}s ({rate:.0f} orders/s)")
+    if rejected:
+        print(f"Rejected {len(rejected)} rows:")
+        for line_num, reason in rejected:
+            print(f"  line {line_num}: {reason}")
+
+def selected_range(args):
+    """
+    Returns the days selected with --from/--to, or None for a single -d/-m day.
+    Prints an error and returns [] when the selection is invalid.
+    """
+    if not args.range_from:
+        if not (args.date and args.month):
+            print("Error: Please provide -d and -m, or a --from/--to range.")
+            return []
+        return None
+    try:
+        start = parse_day_spec(args.range_from)
+        end = parse_day_spec(args.range_to or args.range_from, end=True)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return []
+    days = days_in_range(start, end)
+    if not days:
+        print("No orders found for the given range.")
+    args.range_label = f"{MONTHS[start[0]]}{start[1]}-{MONTHS[end[0]]}{end[1]}"
+    return days
+
 def print_orders(args):
     """
-    Prints orders for a specific date/month.
+    Prints orders for a specific date/month, or a summary for a range of days.
     Example:
         python Bakery_shop_project.py print -d 2 -m Jun
+        python bakery.py print --from Jun --to Aug --rows
+    """
+    days = selected_range(args)
+    if days is None:
+        data = read_orders_from_json(args.date, args.month)
+        if data:
+            # pandas is imported only where it is used, it dominates startup time
+            import pandas as pd
+            df = pd.DataFrame(data)
+            print(df)
+        return
+    if not days:
+        return
+
+    if not args.rows:
+        # Daily rollups answer the summary without reading any order
+        print("\n".join(summarize_range(days).lines()))
+        return
+
+    # Only row-level output needs the orders in memory
+    summary = RangeSummary()
+    summary.days = len(days)
+    rows = []
+    for date, month, order in iter_range_orders(days):
+        summary.add(order)
+        rows.append(dict(order, Date=f"{date} {month}"))
+    if rows:
+        import pandas as pd
+        print(pd.DataFrame(rows))
+        print()
+    print("\n".join(summary.lines()))
+
+def show_analytics(args):
+    """
+    Prints sales analytics (top items, revenue by hour and weekday, basket
+    sizes) for a day, a --from/--to range, or every saved day, and writes
+    the charts as PNG files.
+    Example:
+        python bakery.py analytics --from Jun --to Aug --top 5
     """
-    data = read_orders_from_json(args.date, args.month)
-    if data:
-        df = pd.DataFrame(data)
-        print(df)
+    if args.range_from or args.date or args.month:
+        days = selected_range(args)
+        if days is None:
+            days = [(args.month, args.date)] if day_exists(args.date, args.month) else []
+            if not days:
+                print("No orders found for the given date.")
+    else:
+        days = list_days()
+        if not days:
+            print("No orders saved yet.")
+    if not days:
+        return
+    # pandas, numpy and matplotlib are only loaded by this subcommand
+    from analytics import report_lines, sales_report
+    report, charts = sales_report(days, top=args.top)
+    print(f"Sales analytics for {len(days)} days")
+    print("\n".join(report_lines(report)))
+    print()
+    for path in charts.values():
+        print(f"Chart: {path}")
+
+def lookup_orders(args):
+    """
+    Finds orders by customer id or customer name (case and extra spaces
+    ignored) through the lookup index, optionally within one month.
+    Example:
+        python bakery.py lookup --id 01M56DC96M54W6P5MK
+        python bakery.py lookup --name "alice smith" -m Jun
+    """
+    if args.rebuild:
+        store = get_store()
+        if not hasattr(store, "rebuild_index"):
+            print("Error: only the JSON day files need a lookup index (BAKERY_STORE=journal).")
+            return
+        start = time.perf_counter()
+        count = store.rebuild_index()
+        print(f"Indexed {count} orders in {time.perf_counter() - start:.2f}s")
+        return
+    if not args.id and not args.name:
+        print("Error: Please provide --id or --name.")
+        return
+    from orders import decode_order
+
+    start = time.perf_counter()
+    found = find_orders(args.id, args.name, args.month)
+    elapsed = time.perf_counter() - start
+    for month, date, order in found:
+        order = decode_order(order)
+        print(f"{date:>2} {month}  {order.time}  {order.customer_id}  {order.customer_name}  "
+              f"{order.description}  ${order.bill:.2f}")
+    print(f"{len(found)} orders found in {elapsed * 1000:.2f} ms")
+
+def generated_on():
+    return f"Report generated on: {time.strftime('%d %b %Y, %H:%M:%S')}"
+
+def write_day_pdf(date, month):
+    """
+    Writes the PDF report of a single day and returns its filename, or None
+    when the day has no orders. This is the unit of work of multi-day runs.
+    """
+    if not day_exists(date, month):
+        return None
+    from pdfreport import OrderReport
+    report = OrderReport(f"Bakery Shop - Orders for {date} {month}", subtitle=generated_on())
+    filename = f"BakeryShop{month}{date}.pdf"
+    report.write(iter_orders(date, month), filename, days=1)
+    return filename
+
+def generate_day_pdfs(args):
+    """
+    Generates one PDF per day for several days of a month, in parallel.
+    Example:
+        python bakery.py pdf -m Jun --all-days --workers 4 --merge
+        python bakery.py pdf -m Jun -d 1,2,15
+    """
+    if not args.month:
+        print("Error: Please provide the month with -m.")
+        return
+    if args.all_days:
+        dates = [date for month, date in list_days() if month == args.month]
+    else:
+        dates = [date.strip() for date in args.date.split(",") if date.strip()]
+    if not dates:
+        print("No orders found for the given month.")
+        return
+
+    workers = args.workers or os.cpu_count() or 1
+    filenames = {}
+
+    def finished(date, filename):
+        if filename:
+            filenames[date] = filename
+            print(f"Saved {filename}")
+        else:
+            print(f"No orders found for {date} {args.month}")
+
+    start = time.perf_counter()
+    if workers > 1 and len(dates) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=min(workers, len(dates))) as pool:
+            futures = {pool.submit(write_day_pdf, date, args.month): date for date in dates}
+            for future in as_completed(futures):
+                date = futures[future]
+                try:
+                    finished(date, future.result())
+                except Exception as e:
+                    print(f"Error: Failed to generate PDF for {date} {args.month}: {e}")
+    else:
+        for date in dates:
+            try:
+                finished(date, write_day_pdf(date, args.month))
+            except ValueError as e:
+                print(f"Error: Failed to generate PDF for {date} {args.month}: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"Generated {len(filenames)} PDFs in {elapsed:.2f}s using {workers} workers")
+
+    if args.merge and filenames:
+        from pdfreport import merge_reports
+        merged = f"BakeryShop{args.month}-merged.pdf"
+        merge_reports([filenames[date] for date in dates if date in filenames], merged)
+        print(f"Merged into {merged}")
 
 def generate_pdf(args):
     """
-    Generates a PDF for a specific date and month.
+    Generates a PDF for a specific date and month, or a summary for a range of days.
     Example:
         python Bakery_shop_project.py pdf -d 2 -m Jun
+        python bakery.py pdf --from Jan --to Dec
     """
-    data = read_orders_from_json(args.date, args.month)
-    if data:
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("arial", size=15)
-        for order in data:
-            line = f"{order['Customer_name']} {order['Customer_id']} {order['Order']} {order['Bill']} {order['Time']}"
-            pdf.cell(40, 10, line)
-            pdf.ln()
-        filename = f"BakeryShop{args.month}{args.date}.pdf"
-        pdf.output(filename)
-        print(f"Data saved as PDF successfully: {filename}")
+    if args.all_days or (args.date and "," in args.date):
+        generate_day_pdfs(args)
+        return
+    days = selected_range(args)
+    if days is None:
+        try:
+            filename = write_day_pdf(args.date, args.month)
+        except ValueError as e:
+            print(f"Error: Failed to generate PDF: {e}")
+            return
+        if filename:
+            print(f"Data saved as PDF successfully: {filename}")
+        else:
+            print("No orders found for the given date and month.")
+        return
+    if not days:
+        return
+
+    from pdfreport import OrderReport
+    multi_day = len(days) > 1
+    report = OrderReport(f"Bakery Shop - Orders {args.range_label}", subtitle=generated_on(),
+                         with_date=multi_day)
+    filename = f"BakeryShop{args.range_label}.pdf"
+    try:
+        if args.rows:
+            orders = (dict(order, Date=f"{date} {month}") if multi_day else order
+                      for date, month, order in iter_range_orders(days))
+            report.write(orders, filename, days=len(days))
+        else:
+            report.write((), filename, show_rows=False, summary=summarize_range(days))
+    except ValueError as e:
+        print(f"Error: Failed to generate PDF: {e}")
+        return
+    print(f"Data saved as PDF successfully: {filename}")
+
+def migrate_orders(args):
+    """
+    Imports all BakeryShop*.json day files into the SQLite order store.
+    Example:
+        python bakery.py migrate --db BakeryShop.db
+    """
+    store = SqliteStore(args.db)
+    imported = store.migrate(args.dir)
+    for name, count in imported:
+        print(f"Imported {count} orders from {name}")
+    print(f"Migrated {len(imported)} day files into {args.db}")
+    print("Set BAKERY_STORE=sqlite to read and write orders through it.")
+
+def rebuild_rollups(args):
+    """
+    Recomputes the daily rollups from the saved orders, e.g. after editing
+    a day file by hand. Limit it to a month or a day with -m and -d.
+    Example:
+        python bakery.py rebuild-rollups -m Jun
+    """
+    days = [(month, date) for month, date in list_days()
+            if (not args.month or month == args.month) and (not args.date or date == args.date)]
+    drifted = 0
+    for month, date in days:
+        old, new = rebuild_rollup(date, month)
+        if old != new:
+            drifted += 1
+            print(f"Rebuilt {date} {month}: {new.orders} orders, ${new.revenue:.2f}")
+    print(f"Checked {len(days)} days, {drifted} rollups rebuilt.")
+
+def archive_days(args):
+    """
+    Moves closed days (every day but today) from their JSON files into the
+    columnar archive used by the analytics. Archived days read like any other.
+    Example:
+        python bakery.py archive -m Jun
+    """
+    if os.environ.get("BAKERY_STORE", "journal").lower() != "journal":
+        print("Error: archive works on the JSON day files (BAKERY_STORE=journal).")
+        return
+    from archive import archive_day
+    _, today, this_month = current_order_time()
+    days = sorted({(month, date) for month, date, path in list_day_files()
+                   if not path.endswith(ARCHIVE_EXT) and os.path.getsize(path) > 0})
+    archived = 0
+    for month, date in days:
+        if (month, date) == (this_month, str(today)):
+            continue
+        if (args.month and month != args.month) or (args.date and date != args.date):
+            continue
+        count = archive_day(date, month)
+        archived += 1
+        print(f"Archived {date} {month}: {count} orders")
+    print(f"Archived {archived} days.")
 
 def clear_screen(_args):
     """
@@ -116,18 +464,69 @@ def main():
     order_parser.add_argument("--bill", "-b", type=float, required=True, help="Bill amount")
     order_parser.set_defaults(func=order_process)
     
+    # Subparser for 'import'
+    import_parser = subparsers.add_parser("import", help="Import many orders from a CSV or JSONL file")
+    import_parser.add_argument("file", type=str, help="CSV or JSONL file with orders, or - for stdin")
+    import_parser.add_argument("--format", "-f", choices=["csv", "jsonl"], help="Input format (default: from file extension, jsonl for stdin)")
+    import_parser.add_argument("--batch-size", type=int, default=1000, help="Orders written per batch")
+    import_parser.set_defaults(func=import_orders)
+    
     # Subparser for 'print'
     print_parser = subparsers.add_parser("print", help="Print orders")
-    print_parser.add_argument("-d", "--date", type=str, required=True, help="Date (e.g., 2,27 etc.)")
-    print_parser.add_argument("-m", "--month", type=str, required=True, help="Month (e.g., Jun, Jul, Feb etc.)")
+    print_parser.add_argument("-d", "--date", type=str, help="Date (e.g., 2,27 etc.)")
+    print_parser.add_argument("-m", "--month", type=str, help="Month (e.g., Jun, Jul, Feb etc.)")
+    print_parser.add_argument("--from", dest="range_from", type=str, help="First day of a range (e.g., 2Jun, or Jun for the whole month)")
+    print_parser.add_argument("--to", dest="range_to", type=str, help="Last day of the range (default: same as --from)")
+    print_parser.add_argument("--rows", action="store_true", help="Include every order of the range, not just the summary")
     print_parser.set_defaults(func=print_orders)
     
     # Subparser for 'pdf'
     pdf_parser = subparsers.add_parser("pdf", help="Generate a PDF of orders")
-    pdf_parser.add_argument("-d", "--date", type=str, required=True, help="Date (e.g., 2,27 etc.)")
-    pdf_parser.add_argument("-m", "--month", type=str, required=True, help="Month (e.g., Jun, Jul, Feb etc.)")
+    pdf_parser.add_argument("-d", "--date", type=str, help="Date, or a comma separated list of dates (e.g., 2 or 1,2,27)")
+    pdf_parser.add_argument("-m", "--month", type=str, help="Month (e.g., Jun, Jul, Feb etc.)")
+    pdf_parser.add_argument("--from", dest="range_from", type=str, help="First day of a range (e.g., 2Jun, or Jun for the whole month)")
+    pdf_parser.add_argument("--to", dest="range_to", type=str, help="Last day of the range (default: same as --from)")
+    pdf_parser.add_argument("--rows", action="store_true", help="Include every order of the range, not just the summary")
+    pdf_parser.add_argument("--all-days", action="store_true", help="One PDF for every day of the -m month")
+    pdf_parser.add_argument("--workers", "-w", type=int, default=None, help="Processes for multi-day PDFs (default: CPU count)")
+    pdf_parser.add_argument("--merge", action="store_true", help="Also merge the per-day PDFs into one document")
     pdf_parser.set_defaults(func=generate_pdf)
     
+    # Subparser for 'analytics'
+    analytics_parser = subparsers.add_parser("analytics", help="Sales analytics and charts")
+    analytics_parser.add_argument("-d", "--date", type=str, help="Date (e.g., 2,27 etc.)")
+    analytics_parser.add_argument("-m", "--month", type=str, help="Month (e.g., Jun, Jul, Feb etc.)")
+    analytics_parser.add_argument("--from", dest="range_from", type=str, help="First day of a range (default: every saved day)")
+    analytics_parser.add_argument("--to", dest="range_to", type=str, help="Last day of the range (default: same as --from)")
+    analytics_parser.add_argument("--top", type=int, default=10, help="Number of top items to show")
+    analytics_parser.set_defaults(func=show_analytics)
+    
+    # Subparser for 'lookup'
+    lookup_parser = subparsers.add_parser("lookup", help="Find orders by customer id or name")
+    lookup_parser.add_argument("--id", type=str, help="Customer / order id")
+    lookup_parser.add_argument("--name", "-n", type=str, help="Customer name")
+    lookup_parser.add_argument("-m", "--month", type=str, help="Only this month")
+    lookup_parser.add_argument("--rebuild", action="store_true", help="Rebuild the lookup index from the day files")
+    lookup_parser.set_defaults(func=lookup_orders)
+    
+    # Subparser for 'migrate'
+    migrate_parser = subparsers.add_parser("migrate", help="Import JSON day files into the SQLite store")
+    migrate_parser.add_argument("--db", type=str, default=DEFAULT_DB, help="SQLite database path")
+    migrate_parser.add_argument("--dir", type=str, default=".", help="Directory containing BakeryShop*.json files")
+    migrate_parser.set_defaults(func=migrate_orders)
+    
+    # Subparser for 'rebuild-rollups'
+    rollup_parser = subparsers.add_parser("rebuild-rollups", help="Recompute the daily summaries from the orders")
+    rollup_parser.add_argument("-d", "--date", type=str, help="Only this date")
+    rollup_parser.add_argument("-m", "--month", type=str, help="Only this month")
+    rollup_parser.set_defaults(func=rebuild_rollups)
+    
+    # Subparser for 'archive'
+    archive_parser = subparsers.add_parser("archive", help="Convert closed days to the columnar archive")
+    archive_parser.add_argument("-d", "--date", type=str, help="Only this date")
+    archive_parser.add_argument("-m", "--month", type=str, help="Only this month")
+    archive_parser.set_defaults(func=archive_days)
+    
     # Subparser for 'clear'
     clear_parser = subparsers.add_parser("clear", help="Clear the screen")
     clear_parser.set_defaults(func=clear_screen)
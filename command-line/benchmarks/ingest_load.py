@@ -0,0 +1,141 @@
+"""
+Load generator for the order server.
+
+Opens several keep-alive connections that post orders as fast as the
+server confirms them, then reports orders per second and request latency
+percentiles. Without --url a server is started on a free localhost port
+in a scratch directory, and the saved order count is checked afterwards.
+
+Run from the command-line folder:
+    python -m benchmarks.ingest_load --clients 32 --orders 20000
+    python -m benchmarks.ingest_load --url http://127.0.0.1:8765 --batch 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urlopen(url + "/days", timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+async def post(reader, writer, host, body):
+    writer.write((f"POST /orders HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(url, number, requests, batch, latencies, errors):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    try:
+        for i in range(requests):
+            records = [{"date": "1", "month": "Jan", "order": {
+                "Customer_name": f"Till {number}",
+                "Customer_id": f"{number}-{i}-{j}",
+                "Order": "Bread",
+                "Bill": "2.5",
+                "Time": "12:00:00",
+            }} for j in range(batch)]
+            start = time.perf_counter()
+            status = await post(reader, writer, parts.netloc, json.dumps(records).encode())
+            latencies.append(time.perf_counter() - start)
+            if status != 201:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(url, clients, orders, batch):
+    requests = max(orders // (clients * batch), 1)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(url, c, requests, batch, latencies, errors) for c in range(clients)))
+    return time.perf_counter() - start, latencies, errors, clients * requests * batch
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order server load generator")
+    parser.add_argument("--url", help="Server to load (default: start one on localhost)")
+    parser.add_argument("--clients", "-c", type=int, default=16, help="Concurrent connections")
+    parser.add_argument("--orders", "-n", type=int, default=5000, help="Orders to send in total")
+    parser.add_argument("--batch", "-b", type=int, default=1, help="Orders per request")
+    parser.add_argument("--backend", choices=["journal", "sqlite"], default="journal",
+                        help="Store of the server started here")
+    args = parser.parse_args()
+
+    server = workdir = None
+    url = args.url
+    if not url:
+        workdir = tempfile.TemporaryDirectory()
+        url = f"http://127.0.0.1:{free_port()}"
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, "orderserver.py"), "--port", url.rsplit(":", 1)[1]],
+            cwd=workdir.name, stdout=subprocess.DEVNULL, env=dict(os.environ, BAKERY_STORE=args.backend))
+    try:
+        wait_for(url)
+        elapsed, latencies, errors, sent = asyncio.run(run_load(url, args.clients, args.orders, args.batch))
+        print(f"{sent} orders in {len(latencies)} requests from {args.clients} clients in {elapsed:.2f}s")
+        print(f"throughput: {sent / elapsed:.0f} orders/s")
+        print(f"latency: p50 {percentile(latencies, 0.5) * 1000:.1f}ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms  max {max(latencies) * 1000:.1f}ms")
+        failed = bool(errors)
+        if errors:
+            print(f"FAIL: {len(errors)} requests failed")
+        if server:
+            with urlopen(url + "/days/Jan/1/summary") as response:
+                saved = json.load(response)["Orders"]
+            print(f"saved: {saved} orders")
+            if saved != sent:
+                failed = True
+                print(f"FAIL: sent {sent} orders but {saved} were saved")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+            workdir.cleanup()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
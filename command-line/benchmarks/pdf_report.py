@@ -0,0 +1,40 @@
+"""
+Benchmark for the paginated PDF report engine.
+
+Writes reports for synthetic days of 10k and 100k orders and prints the
+time taken, the peak Python memory (tracemalloc) and the file size.
+
+Run from the command-line folder:
+    python -m benchmarks.pdf_report --orders 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_day
+from pdfreport import OrderReport
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF report engine benchmark")
+    parser.add_argument("--orders", "-n", type=int, nargs="+", default=[10000, 100000], help="Orders per day")
+    args = parser.parse_args()
+
+    print(f"{'orders':>8} {'seconds':>9} {'orders/s':>10} {'peak MB':>9} {'file MB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.orders:
+            filename = os.path.join(directory, f"bench_{count}.pdf")
+            report = OrderReport(f"Benchmark - {count} orders")
+            tracemalloc.start()
+            start = time.perf_counter()
+            report.write(synthetic_day(count), filename, days=1)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = os.path.getsize(filename)
+            print(f"{count:8d} {elapsed:9.2f} {count / elapsed:10.0f} {peak / 2**20:9.1f} {size / 2**20:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
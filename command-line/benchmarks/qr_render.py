@@ -0,0 +1,72 @@
+"""
+Benchmark of the QR rasteriser against qrcode's own image drawing.
+
+For every QR version it times qr.make_image() (one rectangle per module
+through PIL) and qrraster.rasterize() (NumPy block expansion) on the same
+made QR code, and checks that both images have the same mode and pixels.
+Encoding the data is not timed; both paths start from the module matrix.
+
+Run from the command-line folder:
+    python -m benchmarks.qr_render
+    python -m benchmarks.qr_render --versions 1 10 20 40 --fill navy --background "#ffeeaa"
+"""
+import argparse
+import sys
+import time
+
+import qrcode
+
+from qrraster import rasterize
+
+
+def best_of(repeat, function):
+    # Warm up once, so no first-call cost is timed
+    function()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QR rasteriser benchmark")
+    parser.add_argument("--versions", type=int, nargs="+", default=list(range(1, 41)), help="QR versions (1-40)")
+    parser.add_argument("--box-size", type=int, default=10, help="Pixels per module")
+    parser.add_argument("--border", type=int, default=4, help="Border in modules")
+    parser.add_argument("--fill", default="black", help="Fill color")
+    parser.add_argument("--background", default="white", help="Background color")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Runs per version; the best one counts")
+    args = parser.parse_args()
+
+    print(f"{'version':>7} {'pixels':>11} {'make_image ms':>14} {'rasterize ms':>13} {'speedup':>8}")
+    total_old = total_new = 0.0
+    mismatches = []
+    for version in args.versions:
+        qr = qrcode.QRCode(version=version, box_size=args.box_size, border=args.border,
+                           error_correction=qrcode.constants.ERROR_CORRECT_L)
+        # Short enough for version 1; the version alone decides the module count
+        qr.add_data("12345")
+        qr.make(fit=False)
+        old = best_of(args.repeat, lambda: qr.make_image(fill_color=args.fill, back_color=args.background))
+        new = best_of(args.repeat, lambda: rasterize(qr, args.fill, args.background, use_numpy=True))
+        total_old += old
+        total_new += new
+
+        expected = qr.make_image(fill_color=args.fill, back_color=args.background).get_image()
+        image = rasterize(qr, args.fill, args.background, use_numpy=True)
+        if (image.mode, image.size, image.tobytes()) != (expected.mode, expected.size, expected.tobytes()):
+            mismatches.append(version)
+        side = image.size[0]
+        print(f"{version:7d} {f'{side}x{side}':>11} {old * 1000:14.2f} {new * 1000:13.2f} {old / new:7.1f}x")
+
+    print(f"{'all':>7} {'':>11} {total_old * 1000:14.2f} {total_new * 1000:13.2f} {total_old / total_new:7.1f}x")
+    if mismatches:
+        print(f"FAIL: images differ for versions {mismatches}")
+        sys.exit(1)
+    print("All images are pixel-identical.")
+
+
+if __name__ == "__main__":
+    main()
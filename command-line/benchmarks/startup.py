@@ -0,0 +1,86 @@
+"""
+Startup benchmark for the command-line tools.
+
+Runs each subcommand under ``python -X importtime`` in a scratch directory,
+reports the total import cost and fails when a subcommand loads a heavy
+dependency it does not need, or goes over the time budget.
+
+Run from the command-line folder:
+    python -m benchmarks.startup --repeat 5 --budget-ms 150
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "fpdf", "numpy", "matplotlib", "PIL", "qrcode", "validators")
+
+# (label, script, arguments, heavy modules this path is allowed to load)
+COMMANDS = [
+    ("bakery --help", "bakery.py", ["--help"], ()),
+    ("bakery order", "bakery.py", ["order", "-c", "Bench", "-o", "Bread", "-b", "2.5"], ()),
+    ("bakery print (no data)", "bakery.py", ["print", "-d", "1", "-m", "Jan"], ()),
+    ("bakery print --from", "bakery.py", ["print", "--from", "Jan"], ()),
+    ("bakery clear", "bakery.py", ["clear"], ()),
+    ("qrgenerator --help", "qrgenerator.py", ["--help"], ()),
+    ("qrgenerator --data", "qrgenerator.py", ["--data", "bench", "-o", "bench"], ("qrcode", "PIL")),
+    ("game --help", "game.py", ["--help"], ()),
+]
+
+
+def import_profile(script, arguments, cwd):
+    """Return (total import time in ms, set of top-level packages imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(HERE, script)] + arguments,
+        cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, text=True, env=dict(os.environ, TERM="dumb"))
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        packages.add(name.strip().split(".")[0])
+        # Only top-level imports count towards the total, nested ones are
+        # already part of their parent's cumulative time.
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-subcommand import time benchmark")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="Runs per subcommand (best is kept)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if a light subcommand imports for longer")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'subcommand':28} {'imports (ms)':>12}  heavy modules")
+    for label, script, arguments, allowed in COMMANDS:
+        workdir = tempfile.mkdtemp()
+        try:
+            runs = [import_profile(script, arguments, workdir) for _ in range(args.repeat)]
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        best = min(ms for ms, _ in runs)
+        heavy = sorted(set(HEAVY) & set().union(*(packages for _, packages in runs)))
+        print(f"{label:28} {best:12.1f}  {', '.join(heavy) or '-'}")
+
+        unexpected = [name for name in heavy if name not in allowed]
+        if unexpected:
+            failures.append(f"{label} imports {', '.join(unexpected)}")
+        if args.budget_ms is not None and not allowed and best > args.budget_ms:
+            failures.append(f"{label} took {best:.1f}ms (budget {args.budget_ms:.1f}ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
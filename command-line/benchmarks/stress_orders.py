@@ -0,0 +1,100 @@
+"""
+Stress test for concurrent order saves.
+
+Starts several processes, each with a few saver threads, that all write
+orders for the same day into one working directory at the same time, then
+checks that every order reached the store exactly once and that the day's
+rollup counted each of them.
+
+Run from the command-line folder:
+    python -m benchmarks.stress_orders --processes 8 --orders 500
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import orderstore
+
+
+def save_orders(directory, backend, worker, orders, threads):
+    os.chdir(directory)
+    os.environ["BAKERY_STORE"] = backend
+
+    def saver(thread):
+        for i in range(thread, orders, threads):
+            order_data = {
+                "Customer_name": f"Worker {worker}",
+                "Customer_id": f"{worker}-{i}",
+                "Order": "Bread",
+                "Bill": "2.5",
+                "Time": "12:00:00"
+            }
+            orderstore.append_order(order_data, "1", "Jan")
+
+    savers = [threading.Thread(target=saver, args=(t,)) for t in range(threads)]
+    for t in savers:
+        t.start()
+    for t in savers:
+        t.join()
+
+
+def run(backend, processes, orders, threads):
+    """Run one stress round and return True if no order went missing."""
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=save_orders, args=(directory, backend, w, orders, threads))
+            for w in range(processes)
+        ]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        if backend == "sqlite":
+            store = orderstore.SqliteStore(os.path.join(directory, orderstore.DEFAULT_DB))
+            saved = [order["Customer_id"] for order in store.iter_day("1", "Jan")]
+            rollup = store.get_rollup("1", "Jan")
+            store.close()
+        else:
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                store = orderstore.JournalStore()
+                saved = [order["Customer_id"] for order in store.iter_day("1", "Jan")]
+                rollup = store.get_rollup("1", "Jan")
+            finally:
+                os.chdir(cwd)
+
+    expected = {f"{w}-{i}" for w in range(processes) for i in range(orders)}
+    missing = len(expected - set(saved))
+    duplicates = len(saved) - len(set(saved))
+    failed = [p.exitcode for p in workers if p.exitcode != 0]
+    total = processes * orders
+    print(f"{backend:8} {total} orders from {processes} processes x {threads} threads "
+          f"in {elapsed:.2f}s ({total / elapsed:.0f} orders/s): "
+          f"{missing} missing, {duplicates} duplicated, {len(failed)} workers failed, "
+          f"rollup counts {rollup.orders}")
+    return missing == 0 and duplicates == 0 and not failed and rollup.orders == len(saved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent order save stress test")
+    parser.add_argument("--processes", "-p", type=int, default=8, help="Number of saving processes")
+    parser.add_argument("--threads", "-t", type=int, default=4, help="Saver threads per process")
+    parser.add_argument("--orders", "-n", type=int, default=500, help="Orders saved per process")
+    parser.add_argument("--backend", choices=["journal", "sqlite", "all"], default="all", help="Store to test")
+    args = parser.parse_args()
+
+    backends = ["journal", "sqlite"] if args.backend == "all" else [args.backend]
+    ok = all([run(backend, args.processes, args.orders, args.threads) for backend in backends])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
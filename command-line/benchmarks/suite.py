@@ -0,0 +1,171 @@
+"""
+Order store benchmark suite.
+
+For every backend and day size it fills a scratch directory with a
+synthetic day and times the save, read, print, pdf and summary paths
+used by the two apps. Results are printed as a table and can be written
+as JSON, and an earlier JSON file can be given to compare against.
+
+The Kivy app cannot be imported without a window; its paths are timed
+through the shared functions it calls (append_order, read_orders and
+OrderReport), with orders in its format.
+
+Run from the command-line folder:
+    python -m benchmarks.suite --sizes 100 10000 100000 --output before.json
+    python -m benchmarks.suite --sizes 100 10000 100000 --compare before.json
+    python -m benchmarks.suite --sizes 1000000 --paths save.bulk read.stream summary.rollup
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import orderstore
+from benchmarks.synthetic import synthetic_day
+
+DAY = ("1", "Jan")
+PATHS = ("save.cli", "save.kivy", "save.bulk", "read.list", "read.stream",
+         "print.day", "summary.rollup", "summary.rebuild", "pdf.day", "lookup.id")
+BULK_BATCH = 1000
+
+
+def use_backend(backend):
+    """Point the order store at the current directory with a fresh backend."""
+    if isinstance(orderstore._store, (orderstore.SqliteStore, orderstore.JournalStore)):
+        orderstore._store.close()
+    orderstore._store = None
+    os.environ["BAKERY_STORE"] = backend
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run_size(backend, count, paths, save_sample):
+    """Run the selected paths on a day of ``count`` orders; returns [(path, orders, seconds)]."""
+    import bakery
+    from reports import summarize_range
+
+    date, month = DAY
+    results = []
+    quiet = argparse.Namespace(date=date, month=month, range_from=None, range_to=None, rows=False)
+    summary = argparse.Namespace(date=None, month=None, range_from=f"{date}{month}", range_to=None, rows=False)
+
+    # One order at a time, as the tills save them, on a sample of orders
+    # (every save is its own locked, fsynced write)
+    sample = min(count, save_sample)
+    if "save.cli" in paths:
+        orders = list(synthetic_day(sample, seed=1, schema="cli"))
+        results.append(("save.cli", sample, timed(lambda: [
+            bakery.save_order_to_json(order["Customer_name"], order["Customer_id"], order["Order"],
+                                      order["Bill"], order["Time"], "2", month) for order in orders])))
+    if "save.kivy" in paths:
+        orders = list(synthetic_day(sample, seed=2, schema="kivy", day=("3", month)))
+        results.append(("save.kivy", sample, timed(lambda: [
+            orderstore.append_order(order, "3", month) for order in orders])))
+
+    # The day everything else reads is filled through the batch import path;
+    # only the saves are timed, not generating the orders
+    seconds = 0.0
+    batch = []
+    lookups = []
+    for order in synthetic_day(count, seed=0, schema="mixed", day=DAY):
+        if len(lookups) < save_sample:
+            lookups.append(order["Customer_id"])
+        batch.append((order, date, month))
+        if len(batch) == BULK_BATCH:
+            seconds += timed(lambda: orderstore.append_orders(batch))
+            batch = []
+    if batch:
+        seconds += timed(lambda: orderstore.append_orders(batch))
+    if "save.bulk" in paths:
+        results.append(("save.bulk", count, seconds))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if "read.list" in paths:
+            results.append(("read.list", count, timed(lambda: bakery.read_orders_from_json(date, month))))
+        if "read.stream" in paths:
+            results.append(("read.stream", count, timed(lambda: sum(1 for _ in orderstore.iter_orders(date, month)))))
+        if "print.day" in paths:
+            results.append(("print.day", count, timed(lambda: bakery.print_orders(quiet))))
+        if "summary.rollup" in paths:
+            results.append(("summary.rollup", count, timed(lambda: bakery.print_orders(summary))))
+        if "summary.rebuild" in paths:
+            results.append(("summary.rebuild", count, timed(lambda: orderstore.rebuild_rollup(date, month))))
+        if "pdf.day" in paths:
+            results.append(("pdf.day", count, timed(lambda: bakery.write_day_pdf(date, month))))
+        if "lookup.id" in paths:
+            # Timed per lookup ("orders" is the number of lookups)
+            orderstore.find_orders(lookups[0])
+            results.append(("lookup.id", len(lookups), timed(lambda: [
+                orderstore.find_orders(customer_id) for customer_id in lookups])))
+    # The rollup must agree with what was saved, or the timings mean nothing
+    assert summarize_range([(month, date)]).orders == count
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order store benchmark suite")
+    parser.add_argument("--sizes", "-n", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="Orders in the synthetic day (100 to 1000000)")
+    parser.add_argument("--backends", nargs="+", choices=["journal", "sqlite"], default=["journal", "sqlite"])
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS), help="Paths to time")
+    parser.add_argument("--save-sample", type=int, default=2000, help="Orders saved one at a time per save path")
+    parser.add_argument("--output", "-o", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            previous = {(r["backend"], r["orders"], r["path"]): r["seconds"] for r in json.load(file)["results"]}
+
+    if "print.day" in args.paths:
+        # Import pandas up front so the first run does not pay for it
+        import pandas  # noqa: F401
+
+    results = []
+    here = os.getcwd()
+    print(f"{'backend':8} {'orders':>8} {'path':16} {'seconds':>9} {'orders/s':>11}" + ("  vs before" if previous else ""))
+    for backend in args.backends:
+        for count in args.sizes:
+            with tempfile.TemporaryDirectory() as directory:
+                os.chdir(directory)
+                use_backend(backend)
+                try:
+                    timings = run_size(backend, count, args.paths, args.save_sample)
+                finally:
+                    use_backend(backend)
+                    os.chdir(here)
+            for path, orders, seconds in timings:
+                result = {"backend": backend, "orders": count, "path": path, "measured_orders": orders,
+                          "seconds": round(seconds, 6), "orders_per_second": round(orders / seconds, 1)}
+                results.append(result)
+                line = f"{backend:8} {count:8d} {path:16} {seconds:9.3f} {orders / seconds:11.0f}"
+                before = previous.get((backend, count, path))
+                if before:
+                    line += f"  {seconds / before:6.2f}x time"
+                print(line)
+
+    if args.output:
+        meta = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "argv": sys.argv[1:],
+        }
+        with open(args.output, 'w') as file:
+            json.dump({"meta": meta, "results": results}, file, indent=1)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
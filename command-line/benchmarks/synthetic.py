@@ -0,0 +1,97 @@
+"""
+Synthetic bakery days for the benchmarks.
+
+Orders draw their items from the real menu (BAKERY_ITEMS) and arrive over
+opening hours with a breakfast rush, a smaller lunch peak and a quiet
+afternoon, in time order like a real day file. Output is deterministic
+for a given seed, so runs can be compared.
+"""
+import random
+from itertools import accumulate
+
+from menu import BAKERY_ITEMS
+
+OPEN, CLOSE = 7 * 3600, 19 * 3600
+# Share of the day's customers, mean arrival time and spread in seconds
+PEAKS = [
+    (0.45, 8.25 * 3600, 45 * 60),    # breakfast rush
+    (0.25, 12.5 * 3600, 40 * 60),    # lunch
+]
+# Popular items are picked more often
+ITEM_WEIGHTS = {"Bread": 8, "Coffee": 9, "Croissant": 6, "Tea": 4, "Donut": 4, "Muffin": 3,
+                "Cake Slice": 2, "Cupcake": 2, "Cookie": 3, "Brownie": 2}
+FIRST_NAMES = ["Alice", "Bob", "Carla", "Dev", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jon",
+               "Kofi", "Lena", "Mateo", "Nora", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tara"]
+LAST_NAMES = ["Smith", "Khan", "Garcia", "Chen", "Okafor", "Rossi", "Novak", "Silva", "Berg", "Ito"]
+
+
+def arrival_times(count, rng):
+    """Return ``count`` sorted arrival times in seconds since midnight."""
+    times = []
+    while len(times) < count:
+        pick = rng.random()
+        for share, mean, spread in PEAKS:
+            if pick < share:
+                seconds = rng.gauss(mean, spread)
+                break
+            pick -= share
+        else:
+            seconds = rng.uniform(OPEN, CLOSE)
+        # Customers outside opening hours are simply not counted
+        if OPEN <= seconds < CLOSE:
+            times.append(int(seconds))
+    times.sort()
+    return times
+
+
+NAMES = list(BAKERY_ITEMS)
+ITEM_CUM_WEIGHTS = list(accumulate(ITEM_WEIGHTS[item] for item in NAMES))
+LINES_CUM_WEIGHTS = list(accumulate((55, 30, 11, 4)))
+QUANTITY_CUM_WEIGHTS = list(accumulate((70, 20, 7, 3)))
+
+
+def basket(rng):
+    """Return [(item, quantity)] for one customer: mostly one or two lines."""
+    lines = rng.choices((1, 2, 3, 4), cum_weights=LINES_CUM_WEIGHTS)[0]
+    items = []
+    while len(items) < lines:
+        item = rng.choices(NAMES, cum_weights=ITEM_CUM_WEIGHTS)[0]
+        if item not in items:
+            items.append(item)
+    return [(item, rng.choices((1, 2, 3, 6), cum_weights=QUANTITY_CUM_WEIGHTS)[0]) for item in items]
+
+
+def synthetic_day(count, seed=0, schema="kivy", day=("1", "Jan")):
+    """
+    Yield ``count`` orders of one day in time order.
+
+    ``schema`` is "kivy" (Order_items/Total_bill), "cli" (Order/Bill) or
+    "mixed" (both, as in a folder shared by the two apps).
+    """
+    rng = random.Random(seed)
+    date, month = day
+    for i, seconds in enumerate(arrival_times(count, rng)):
+        order_time = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        lines = basket(rng)
+        kind = schema if schema != "mixed" else rng.choice(("kivy", "cli"))
+        if kind == "cli":
+            item, quantity = lines[0]
+            yield {
+                "Customer_name": name,
+                "Customer_id": rng.randint(1000000000, 3999999999),
+                "Order": item,
+                "Bill": str(round(BAKERY_ITEMS[item] * quantity, 2)),
+                "Time": order_time,
+            }
+            continue
+        items = [{"item": item, "quantity": quantity, "price": BAKERY_ITEMS[item],
+                  "total": BAKERY_ITEMS[item] * quantity} for item, quantity in lines]
+        yield {
+            "Customer_name": name,
+            "Customer_id": f"CUST-{i:07d}",
+            "Order_items": items,
+            "Total_bill": sum(item["total"] for item in items),
+            "Time": order_time,
+            "Date": f"{date} {month}",
+        }
@@ -0,0 +1,14 @@
+# Items sold at the counter and their unit prices, shared by the Kivy till
+# and the tools that need realistic orders (e.g. the benchmarks)
+BAKERY_ITEMS = {
+    "Bread": 2.50,
+    "Croissant": 1.75,
+    "Donut": 1.25,
+    "Cake Slice": 3.50,
+    "Muffin": 1.50,
+    "Cupcake": 2.00,
+    "Cookie": 1.00,
+    "Brownie": 2.25,
+    "Coffee": 2.50,
+    "Tea": 1.75
+}
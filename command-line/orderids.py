@@ -0,0 +1,90 @@
+"""
+Order IDs that sort by the time they were made.
+
+An ID is 18 characters of Crockford base32: 10 for the milliseconds since
+the epoch, then 8 for a 40 bit counter. Each process starts its counter at
+a random value every millisecond and counts up within it, so
+
+  - IDs from one process always increase, even if the clock steps back;
+  - IDs from different processes or tills never share a counter in
+    practice (two tills would need the same millisecond and the same
+    random 40 bits);
+  - sorting IDs as strings sorts them by creation time, to the millisecond.
+
+For example 01K7S3E0Z5J4Q8M2XR.
+"""
+import os
+import secrets
+import threading
+import time
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+TIME_CHARS, COUNTER_CHARS = 10, 8
+COUNTER_BITS = 5 * COUNTER_CHARS
+ID_LENGTH = TIME_CHARS + COUNTER_CHARS
+_VALUES = {char: value for value, char in enumerate(ALPHABET)}
+
+
+def _encode(value, width):
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + _VALUES[char]
+    return value
+
+
+class OrderIdGenerator:
+    """Hands out increasing IDs; safe to share between threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._last_ms = 0
+        self._counter = 0
+
+    def new_id(self):
+        with self._lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > self._last_ms:
+                # Leave room to count up within the millisecond
+                self._counter = secrets.randbits(COUNTER_BITS - 1)
+                self._last_ms = ms
+            else:
+                # Same millisecond, or the clock went back: keep counting
+                # from the last ID so the order never breaks
+                self._counter += 1
+                if self._counter >> COUNTER_BITS:
+                    self._last_ms += 1
+                    self._counter = secrets.randbits(COUNTER_BITS - 1)
+            return _encode(self._last_ms, TIME_CHARS) + _encode(self._counter, COUNTER_CHARS)
+
+
+_generator = OrderIdGenerator()
+if hasattr(os, "register_at_fork"):
+    # A forked worker must not carry on the parent's counter
+    os.register_at_fork(after_in_child=_generator.reset)
+
+
+def new_order_id():
+    """Return a new order ID, later than every ID this process made before."""
+    return _generator.new_id()
+
+
+def is_order_id(value):
+    return isinstance(value, str) and len(value) == ID_LENGTH and all(char in _VALUES for char in value)
+
+
+def order_id_time(order_id):
+    """Return when an order ID was made, in seconds since the epoch, or None for older IDs."""
+    if not is_order_id(order_id):
+        return None
+    return _decode(order_id[:TIME_CHARS]) / 1000
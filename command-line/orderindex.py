@@ -0,0 +1,109 @@
+"""
+Lookup index of the journal store: customer id and name -> where the order is.
+
+Each order has one row holding its day, the file it is in and its offset
+there (byte offset of the line in a .jsonl journal, position in a legacy
+.json array or in an archive), so a lookup reads just the matching orders
+instead of scanning every day. The index is a small SQLite file next to
+the day files, kept up to date under the day's journal lock on every save.
+It can always be rebuilt from the day files (python bakery.py lookup --rebuild).
+"""
+import sqlite3
+import threading
+
+INDEX_FILE = "BakeryShop.index.db"
+# Where an entry's order lives; also the order they are read in within a day
+SOURCE_ARCHIVE, SOURCE_LEGACY, SOURCE_JOURNAL = 0, 1, 2
+
+
+def name_key(name):
+    """Customer names are matched ignoring case and extra spaces."""
+    return " ".join(str(name or "").split()).casefold()
+
+
+class OrderIndex:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            month TEXT NOT NULL,
+            date TEXT NOT NULL,
+            source INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            customer_id TEXT,
+            name_key TEXT,
+            PRIMARY KEY (month, date, source, offset)
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_customer_id ON entries (customer_id);
+        CREATE INDEX IF NOT EXISTS idx_entries_name_key ON entries (name_key, month);
+        CREATE TABLE IF NOT EXISTS meta (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        # The day files are the source of truth; the index only has to
+        # survive a crashed process, not a power cut
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _rows(date, month, entries):
+        return [(month, str(date), source, offset, str(customer_id), name_key(customer_name))
+                for source, offset, customer_id, customer_name in entries]
+
+    def add(self, date, month, entries):
+        """Index (source, offset, customer_id, customer_name) entries of a day."""
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                                  self._rows(date, month, entries))
+
+    def replace_day(self, date, month, entries):
+        """Replace every entry of a day, e.g. after it was archived; returns how many there are."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM entries WHERE month = ? AND date = ?", (month, str(date)))
+            rows = self._rows(date, month, entries)
+            self.conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+
+    def find(self, customer_id=None, name=None, month=None):
+        """Return (month, date, source, offset) of the matching orders."""
+        conditions, params = [], []
+        if customer_id is not None:
+            conditions.append("customer_id = ?")
+            params.append(str(customer_id))
+        if name is not None:
+            conditions.append("name_key = ?")
+            params.append(name_key(name))
+        if month is not None:
+            conditions.append("month = ?")
+            params.append(month)
+        query = "SELECT month, date, source, offset FROM entries"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY month, date, source, offset"
+        with self._lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def is_complete(self):
+        """Whether every saved order is known to be indexed."""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE name = 'complete'").fetchone()
+        return row is not None
+
+    def set_complete(self, complete):
+        with self._lock, self.conn:
+            if complete:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('complete', '1')")
+            else:
+                self.conn.execute("DELETE FROM meta WHERE name = 'complete'")
@@ -0,0 +1,112 @@
+import sys
+
+# The two front ends save different layouts:
+#   CLI:  {"Customer_name", "Customer_id", "Order": text, "Bill": "2.5", "Time"}
+#   Kivy: {"Customer_name", "Customer_id", "Order_items": [{"item", "quantity",
+#          "price", "total"}], "Total_bill": 2.5, "Time", "Date"}
+# Order.from_dict() reads either one, once, into compact objects that every
+# reader shares; to_dict() writes an order back in the layout it came from.
+SCHEMA_CLI, SCHEMA_KIVY = 0, 1
+
+
+def parse_bill(value):
+    """Return a bill as a number; unreadable bills count as 0."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class OrderItem:
+    """One line of an order: an item, how many and the unit price."""
+
+    __slots__ = ("item", "quantity", "price")
+
+    def __init__(self, item, quantity, price):
+        # Item names repeat across every order of a day; keep one copy
+        self.item = sys.intern(str(item))
+        self.quantity = quantity
+        self.price = price
+
+    @property
+    def total(self):
+        return self.quantity * self.price
+
+    def to_dict(self):
+        return {"item": self.item, "quantity": self.quantity, "price": self.price, "total": self.total}
+
+
+class Order:
+    """
+    An order from either front end, with its bill already parsed.
+
+    A CLI order's free text becomes a single item of quantity 1 priced at
+    the bill, so readers can treat both layouts the same way.
+    """
+
+    __slots__ = ("customer_name", "customer_id", "items", "bill", "time", "date", "schema")
+
+    def __init__(self, customer_name, customer_id, items, bill, time, date=None, schema=SCHEMA_KIVY):
+        self.customer_name = customer_name
+        self.customer_id = customer_id
+        self.items = items
+        self.bill = bill
+        self.time = time
+        self.date = date
+        self.schema = schema
+
+    @classmethod
+    def from_dict(cls, data):
+        items = data.get('Order_items')
+        if isinstance(items, list):
+            return cls(data.get('Customer_name', ''), data.get('Customer_id', ''),
+                       tuple(OrderItem(item['item'], int(item['quantity']), float(item['price']))
+                             for item in items),
+                       parse_bill(data.get('Total_bill', 0)), data.get('Time', ''), data.get('Date'))
+        bill = parse_bill(data.get('Bill', 0))
+        text = data.get('Order')
+        return cls(data.get('Customer_name', ''), data.get('Customer_id', ''),
+                   (OrderItem(text, 1, bill),) if text else (),
+                   bill, data.get('Time', ''), data.get('Date'), SCHEMA_CLI)
+
+    def to_dict(self):
+        if self.schema == SCHEMA_CLI:
+            data = {
+                "Customer_name": self.customer_name,
+                "Customer_id": self.customer_id,
+                "Order": self.items[0].item if self.items else "",
+                "Bill": str(self.bill),
+                "Time": self.time,
+            }
+            if self.date:
+                data["Date"] = self.date
+            return data
+        return {
+            "Customer_name": self.customer_name,
+            "Customer_id": self.customer_id,
+            "Order_items": [item.to_dict() for item in self.items],
+            "Total_bill": self.bill,
+            "Time": self.time,
+            "Date": self.date,
+        }
+
+    @property
+    def hour(self):
+        """Hour the order was placed, or None if the time is unreadable."""
+        try:
+            hour = int(str(self.time)[:2])
+        except ValueError:
+            return None
+        return hour if 0 <= hour < 24 else None
+
+    @property
+    def description(self):
+        """One line describing what was ordered."""
+        if self.schema == SCHEMA_CLI:
+            return self.items[0].item if self.items else ""
+        return ", ".join(f"{item.item} x{item.quantity}" for item in self.items)
+
+
+def decode_order(order):
+    """Return an Order for a stored dict; Orders are passed through."""
+    return order if isinstance(order, Order) else Order.from_dict(order)
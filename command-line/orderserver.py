@@ -0,0 +1,231 @@
+"""
+Order server: lets several tills share one order store over HTTP.
+
+    POST /orders                           save one record {"date", "month", "order"}
+                                           or a list of them; date and month
+                                           default to today
+    GET  /orders?customer_id=&name=&month= orders of a customer, as
+                                           [{"month", "date", "order"}, ...]
+    GET  /days                             [[month, date], ...]
+    GET  /days/<month>/<date>              the orders of a day
+    GET  /days/<month>/<date>/summary      the day's rollup
+    POST /days/<month>/<date>/rebuild-rollup
+
+Orders arriving together are written as one batch. Point the CLI or the
+Kivy app at it with BAKERY_STORE=http and BAKERY_URL=http://host:port.
+
+Example:
+    python orderserver.py --host 0.0.0.0 --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qs
+
+from orderstore import (DEFAULT_URL, MONTHS, append_orders, day_rollup, find_orders, get_store,
+                        list_days, read_orders, rebuild_rollup)
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+# Largest number of orders written in one go
+MAX_BATCH = 1000
+# Largest request body accepted, in bytes
+MAX_BODY = 16 << 20
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def today():
+    """Return (order_time, date, month) for the current local time."""
+    current_time = time.asctime(time.localtime(time.time()))
+    return current_time[11:19], current_time[8:10].strip(), current_time[4:7]
+
+
+def parse_record(record):
+    """Validate a posted record and return (order_data, date, month)."""
+    if not isinstance(record, dict) or not isinstance(record.get("order"), dict):
+        raise HttpError(400, "Each record needs an 'order' object")
+    order_time, date, month = today()
+    order_data = dict(record["order"])
+    order_data.setdefault("Time", order_time)
+    date = str(record.get("date", date))
+    month = record.get("month", month)
+    if month not in MONTHS or not date.isdigit() or not 1 <= int(date) <= 31:
+        raise HttpError(400, f"Invalid day: {date} {month}")
+    return order_data, date, month
+
+
+def content_length(headers):
+    """Return the body length of a request; HttpError if it is invalid or too big."""
+    value = headers.get("content-length", "0")
+    if not value.isdigit():
+        raise HttpError(400, f"Invalid Content-Length: {value!r}")
+    if int(value) > MAX_BODY:
+        raise HttpError(413, f"Body larger than {MAX_BODY} bytes")
+    return int(value)
+
+
+class BatchWriter:
+    """
+    Collects the records of concurrent requests and saves them in batches.
+
+    Each request waits until its own records are written; the save itself
+    runs in a worker thread so the event loop keeps accepting requests.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.orders = 0
+
+    async def submit(self, records):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            waiting = [await self.queue.get()]
+            count = len(waiting[0][0])
+            while not self.queue.empty() and count < MAX_BATCH:
+                waiting.append(self.queue.get_nowait())
+                count += len(waiting[-1][0])
+            records = [record for batch, _ in waiting for record in batch]
+            try:
+                await loop.run_in_executor(None, append_orders, records)
+            except Exception as e:
+                for _, future in waiting:
+                    # The request may be gone (client disconnected)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.orders += len(records)
+            for _, future in waiting:
+                if not future.done():
+                    future.set_result(None)
+
+
+class OrderServer:
+    def __init__(self):
+        self.writer = BatchWriter()
+
+    async def dispatch(self, method, path, body):
+        """Route a request; returns (status, JSON payload)."""
+        loop = asyncio.get_running_loop()
+        path, _, query = path.partition("?")
+        parts = [part for part in path.split("/") if part]
+        if parts == ["orders"] and method == "GET":
+            params = {key: values[0] for key, values in parse_qs(query).items()}
+            if not params.get("customer_id") and not params.get("name"):
+                raise HttpError(400, "Give a customer_id or a name")
+            found = await loop.run_in_executor(None, find_orders, params.get("customer_id"),
+                                               params.get("name"), params.get("month"))
+            return 200, [{"month": month, "date": date, "order": order} for month, date, order in found]
+        if parts == ["orders"]:
+            if method != "POST":
+                raise HttpError(405, "Use GET or POST")
+            try:
+                payload = json.loads(body or b"null")
+            except ValueError:
+                raise HttpError(400, "Body is not valid JSON")
+            records = [parse_record(record) for record in (payload if isinstance(payload, list) else [payload])]
+            await self.writer.submit(records)
+            return 201, {"saved": len(records)}
+        if parts == ["days"] and method == "GET":
+            return 200, await loop.run_in_executor(None, list_days)
+        if len(parts) >= 3 and parts[0] == "days":
+            month, date = parts[1], parts[2]
+            if month not in MONTHS or not date.isdigit():
+                raise HttpError(404, f"Unknown day: {date} {month}")
+            action = parts[3:]
+            if action == [] and method == "GET":
+                return 200, await loop.run_in_executor(None, read_orders, date, month)
+            if action == ["summary"] and method == "GET":
+                rollup = await loop.run_in_executor(None, day_rollup, date, month)
+                return 200, rollup.to_dict()
+            if action == ["rebuild-rollup"] and method == "POST":
+                old, new = await loop.run_in_executor(None, rebuild_rollup, date, month)
+                return 200, {"old": old.to_dict() if old else None, "new": new.to_dict()}
+        raise HttpError(404, f"No route for {method} {path}")
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive, enough for JSON clients
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    length = content_length(headers)
+                except HttpError as e:
+                    # The body can not be skipped, so the connection ends here
+                    status, payload = e.status, {"error": str(e)}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self.dispatch(method, path, body)
+                    except HttpError as e:
+                        status, payload = e.status, {"error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"error": str(e)}
+                data = json.dumps(payload).encode()
+                writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                              f"Content-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        writer_task = asyncio.create_task(self.writer.run())
+        print(f"Serving orders from {type(get_store()).__name__} on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+
+
+def main():
+    default_host, default_port = DEFAULT_URL.split("//")[1].split(":")
+    parser = argparse.ArgumentParser(description="HTTP order server shared by several tills")
+    parser.add_argument("--host", default=default_host, help="Interface to listen on")
+    parser.add_argument("--port", "-p", type=int, default=int(default_port), help="Port to listen on")
+    args = parser.parse_args()
+
+    if os.environ.get("BAKERY_STORE", "journal").lower() == "http":
+        print("Error: the server needs a local store (BAKERY_STORE=journal or sqlite).")
+        return
+    server = OrderServer()
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"Stopped after saving {server.writer.orders} orders in {server.writer.batches} batches.")
+
+
+if __name__ == "__main__":
+    main()
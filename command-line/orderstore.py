@@ -0,0 +1,794 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from orderindex import SOURCE_ARCHIVE, SOURCE_JOURNAL, SOURCE_LEGACY, OrderIndex, name_key
+from rollups import DayRollup
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# Day files are named from the month and date, e.g. BakeryShopJun2.json.
+# Older versions rewrote a JSON array on every save; new orders are appended
+# one JSON object per line to a .jsonl journal next to it.
+LEGACY_EXT = ".json"
+JOURNAL_EXT = ".jsonl"
+# Closed days can be moved into a directory of NumPy columns (see archive.py)
+ARCHIVE_EXT = ".archive"
+# Running totals of each day, kept up to date on every save
+ROLLUP_EXT = ".rollup.json"
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+DAY_FILE_RE = re.compile(r"^BakeryShop([A-Z][a-z]{2})(\d{1,2})\.(?:jsonl?|archive)$")
+
+# Backend selection, shared by the CLI and the Kivy app:
+#   BAKERY_STORE=journal (default), sqlite or http
+#   BAKERY_DB=<path> for the sqlite database (default BakeryShop.db)
+#   BAKERY_URL=<url> of the order server (see orderserver.py)
+DEFAULT_DB = "BakeryShop.db"
+DEFAULT_URL = "http://127.0.0.1:8765"
+# Journal lines end in "\r\n" on disk on Windows
+NEWLINE_BYTES = len(os.linesep)
+
+
+def day_filename(date, month, ext=LEGACY_EXT):
+    """Return the file name used for the given day."""
+    return f"BakeryShop{month}{date}{ext}"
+
+
+def iter_day_file(filename):
+    """
+    Yield the orders stored in a single day file.
+
+    Handles the old array format, the line-delimited journal and archived
+    days. A torn last line (e.g. after a crash mid-write) is skipped.
+    """
+    if filename.endswith(ARCHIVE_EXT):
+        # numpy is only needed once a day has actually been archived
+        from archive import iter_archive
+        month, date = DAY_FILE_RE.match(os.path.basename(filename)).groups()
+        yield from iter_archive(filename, date, month)
+        return
+    with open(filename, 'r') as file:
+        if filename.endswith(LEGACY_EXT):
+            try:
+                data = json.load(file)
+            except json.JSONDecodeError:
+                data = []
+            yield from data
+            return
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def list_day_files(directory="."):
+    """Return (month, date, path) for every day file in a directory."""
+    days = []
+    for path in sorted(glob.glob(os.path.join(directory, "BakeryShop*"))):
+        match = DAY_FILE_RE.match(os.path.basename(path))
+        if match:
+            days.append((match.group(1), match.group(2), path))
+    return days
+
+
+def _lock(file):
+    if os.name == 'nt':
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock(file):
+    if os.name == 'nt':
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def locked_append(filename):
+    """
+    Open a file for appending while holding an exclusive cross-process lock.
+
+    Every terminal (CLI or Kivy) writing to the same day journal goes
+    through this, so batches from different processes never interleave.
+    A journal may be removed by whoever holds its lock (see archive_day);
+    a writer that was waiting for it then locks the new file instead.
+    """
+    while True:
+        file = open(filename, 'a')
+        _lock(file)
+        try:
+            current = os.path.samestat(os.fstat(file.fileno()), os.stat(filename))
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        _unlock(file)
+        file.close()
+    try:
+        yield file
+        file.flush()
+        os.fsync(file.fileno())
+    finally:
+        _unlock(file)
+        file.close()
+
+
+@contextmanager
+def locked_day(date, month):
+    """
+    Hold a day's journal lock to read the day consistently. A journal that
+    only exists because of the lock (legacy or archived days) is removed
+    again before the lock is released, so reading never leaves day files.
+    """
+    journal = day_filename(date, month, JOURNAL_EXT)
+    with locked_append(journal):
+        try:
+            yield
+        finally:
+            if os.path.getsize(journal) == 0:
+                try:
+                    os.remove(journal)
+                except OSError:
+                    # Windows can not remove an open file
+                    pass
+
+
+class GroupCommitWriter:
+    """
+    Batch records from concurrent savers into a single flush.
+
+    Savers queue their records and wait. Whoever finds no flush running
+    becomes the leader and persists everything queued so far in one go;
+    records arriving meanwhile form the next batch. submit() returns once
+    the caller's records are durable and re-raises the flush error if the
+    batch failed.
+    """
+
+    def __init__(self, flush):
+        self._flush = flush
+        self._cond = threading.Condition()
+        self._pending = []
+        self._flushing = False
+        self._next_batch = 0
+        self._done = -1
+        self._errors = {}
+        # Batch number -> savers that have not collected its outcome yet
+        self._savers = {}
+
+    def _collect(self, batch):
+        """Return the error of a finished batch, forgetting it once every saver has seen it."""
+        self._savers[batch] -= 1
+        if self._savers[batch]:
+            return self._errors.get(batch)
+        del self._savers[batch]
+        return self._errors.pop(batch, None)
+
+    def submit(self, records):
+        with self._cond:
+            self._pending.extend(records)
+            mine = self._next_batch
+            self._savers[mine] = self._savers.get(mine, 0) + 1
+            while self._flushing and self._done < mine:
+                self._cond.wait()
+            if self._done >= mine:
+                error = self._collect(mine)
+                if error:
+                    raise error
+                return
+            batch, self._pending = self._pending, []
+            self._next_batch += 1
+            self._flushing = True
+
+        error = None
+        try:
+            self._flush(batch)
+        except Exception as e:
+            error = e
+        except BaseException:
+            # e.g. KeyboardInterrupt: raised here, the waiters get an error
+            error = RuntimeError("Saving was interrupted")
+            raise
+        finally:
+            # Always hand over, or every other saver would wait forever
+            with self._cond:
+                if error:
+                    self._errors[mine] = error
+                self._done = mine
+                self._flushing = False
+                self._cond.notify_all()
+                self._collect(mine)
+        if error:
+            raise error
+
+
+class JournalStore:
+    """Orders kept in per-day journal files in the working directory."""
+
+    def __init__(self):
+        self._writer = GroupCommitWriter(self._write_batch)
+        self._index = None
+        self._index_lock = threading.Lock()
+        # Archives opened by lookups: path -> (meta mtime, columns)
+        self._archives = {}
+
+    @property
+    def index(self):
+        """The lookup index, opened on first use."""
+        with self._index_lock:
+            if self._index is None:
+                self._index = OrderIndex()
+            return self._index
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def has_day(self, date, month):
+        return any(os.path.exists(day_filename(date, month, ext))
+                   for ext in (ARCHIVE_EXT, LEGACY_EXT, JOURNAL_EXT))
+
+    def day_files(self, date, month):
+        """Return the files a day's orders are read from, for change detection."""
+        return [os.path.join(day_filename(date, month, ARCHIVE_EXT), "meta.json"),
+                day_filename(date, month, LEGACY_EXT), day_filename(date, month, JOURNAL_EXT)]
+
+    def save(self, order_data, date, month):
+        """Append a single order to the day journal."""
+        self._writer.submit([(order_data, date, month)])
+
+    def save_many(self, records):
+        """Append a batch of (order_data, date, month) records."""
+        self._writer.submit(list(records))
+
+    def _write_batch(self, records):
+        # One locked write and fsync per day file for the whole batch. The
+        # day's rollup is updated under the same lock.
+        days = {}
+        for order_data, date, month in records:
+            days.setdefault((str(date), month), []).append(order_data)
+        for (date, month), orders in days.items():
+            with locked_append(day_filename(date, month, JOURNAL_EXT)) as file:
+                rollup = self._load_rollup(date, month)
+                lines = [json.dumps(order_data) + "\n" for order_data in orders]
+                # Another process may have appended since the file was opened
+                file.seek(0, os.SEEK_END)
+                offset = file.tell()
+                entries = []
+                for order_data, line in zip(orders, lines):
+                    entries.append((SOURCE_JOURNAL, offset, order_data.get("Customer_id"),
+                                    order_data.get("Customer_name")))
+                    offset += len(line) - 1 + NEWLINE_BYTES
+                file.write("".join(lines))
+                if rollup is None:
+                    file.flush()
+                    rollup = DayRollup.from_orders(self.iter_day(date, month))
+                else:
+                    for order_data in orders:
+                        rollup.add(order_data)
+                self._store_rollup(date, month, rollup)
+                self._index_entries(date, month, entries)
+
+    def _index_entries(self, date, month, entries):
+        # The orders are saved at this point; an index that cannot be
+        # written is rebuilt by the next lookup instead of failing the save
+        try:
+            self.index.add(date, month, entries)
+        except sqlite3.Error:
+            try:
+                self.index.set_complete(False)
+            except sqlite3.Error:
+                pass
+
+    def _load_rollup(self, date, month):
+        try:
+            with open(day_filename(date, month, ROLLUP_EXT), 'r') as file:
+                return DayRollup.from_dict(json.load(file))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store_rollup(self, date, month, rollup):
+        filename = day_filename(date, month, ROLLUP_EXT)
+        with open(filename + ".tmp", 'w') as file:
+            json.dump(rollup.to_dict(), file)
+        os.replace(filename + ".tmp", filename)
+
+    def get_rollup(self, date, month):
+        rollup = self._load_rollup(date, month)
+        if rollup is None:
+            if not self.has_day(date, month):
+                return DayRollup()
+            rollup = self.rebuild_rollup(date, month)[1]
+        return rollup
+
+    def rebuild_rollup(self, date, month):
+        """Recompute a day's rollup from its orders; returns (old, new)."""
+        with locked_day(date, month):
+            old = self._load_rollup(date, month)
+            new = DayRollup.from_orders(self.iter_day(date, month))
+            self._store_rollup(date, month, new)
+        return old, new
+
+    def list_days(self):
+        """Return every (month, date) that has a day file."""
+        return sorted({(month, date) for month, date, _ in list_day_files()})
+
+    def iter_day(self, date, month):
+        """Yield the orders of a day: archive first, then the old array file, then the journal."""
+        for ext in (ARCHIVE_EXT, LEGACY_EXT, JOURNAL_EXT):
+            filename = day_filename(date, month, ext)
+            if os.path.exists(filename):
+                yield from iter_day_file(filename)
+
+    def _day_entries(self, date, month):
+        """Yield (source, offset, customer_id, customer_name) for every order of a day."""
+        archive = day_filename(date, month, ARCHIVE_EXT)
+        if os.path.isdir(archive):
+            from archive import read_columns
+            columns = read_columns(archive)
+            for i, (customer, customer_id) in enumerate(zip(columns.customer.tolist(),
+                                                            columns.customer_id.tolist())):
+                yield SOURCE_ARCHIVE, i, columns.customer_ids[customer_id], columns.customers[customer]
+        legacy = day_filename(date, month, LEGACY_EXT)
+        if os.path.exists(legacy):
+            for i, order in enumerate(iter_day_file(legacy)):
+                yield SOURCE_LEGACY, i, order.get("Customer_id"), order.get("Customer_name")
+        journal = day_filename(date, month, JOURNAL_EXT)
+        if os.path.exists(journal):
+            with open(journal, 'rb') as file:
+                offset = 0
+                for line in file:
+                    try:
+                        order = json.loads(line) if line.strip() else None
+                    except ValueError:
+                        order = None
+                    if isinstance(order, dict):
+                        yield SOURCE_JOURNAL, offset, order.get("Customer_id"), order.get("Customer_name")
+                    offset += len(line)
+
+    def _read_entry(self, date, month, source, offset, legacy):
+        """
+        Read the order an index entry points at, or None if it is not there
+        any more. An old array file has to be parsed as a whole, so ``legacy``
+        keeps the parsed ones for the rest of the lookup.
+        """
+        try:
+            if source == SOURCE_JOURNAL:
+                with open(day_filename(date, month, JOURNAL_EXT), 'rb') as file:
+                    file.seek(offset)
+                    return json.loads(file.readline())
+            if source == SOURCE_LEGACY:
+                filename = day_filename(date, month, LEGACY_EXT)
+                if filename not in legacy:
+                    legacy[filename] = list(iter_day_file(filename))
+                return legacy[filename][offset]
+            return self._archive_columns(date, month).order_at(offset, date, month)
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _archive_columns(self, date, month):
+        # Re-archiving a day replaces its directory, and with it meta.json
+        from archive import read_columns
+        path = day_filename(date, month, ARCHIVE_EXT)
+        mtime = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+        cached = self._archives.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = self._archives[path] = (mtime, read_columns(path))
+        return cached[1]
+
+    def index_day(self, date, month):
+        """Re-index a day from its files; the caller holds the day's journal lock."""
+        return self.index.replace_day(date, month, self._day_entries(date, month))
+
+    def rebuild_index(self):
+        """Re-index every day from its files; returns the number of indexed orders."""
+        self.index.set_complete(False)
+        self.index.clear()
+        count = 0
+        for month, date in self.list_days():
+            with locked_day(date, month):
+                count += self.index_day(date, month)
+        self.index.set_complete(True)
+        return count
+
+    def find_orders(self, customer_id=None, name=None, month=None, _retry=True):
+        """Return (month, date, order) for the orders matching a customer id and/or name."""
+        if not self.index.is_complete():
+            self.rebuild_index()
+        found, stale, legacy = [], set(), {}
+        for entry_month, date, source, offset in self.index.find(customer_id, name, month):
+            order = self._read_entry(date, entry_month, source, offset, legacy)
+            if (not isinstance(order, dict)
+                    or (customer_id is not None and str(order.get("Customer_id")) != str(customer_id))
+                    or (name is not None and name_key(order.get("Customer_name")) != name_key(name))):
+                # The day file changed behind the index's back (edited by hand)
+                stale.add((entry_month, date))
+                continue
+            found.append((entry_month, date, order))
+        if stale and _retry:
+            for entry_month, date in stale:
+                with locked_day(date, entry_month):
+                    self.index_day(date, entry_month)
+            return self.find_orders(customer_id, name, month, _retry=False)
+        return found
+
+
+class SqliteStore:
+    """Orders kept in a single SQLite database indexed by day, time and customer."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY,
+            month TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT,
+            customer_name TEXT,
+            customer_id TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_orders_day ON orders (month, date);
+        CREATE INDEX IF NOT EXISTS idx_orders_time ON orders (time);
+        CREATE INDEX IF NOT EXISTS idx_orders_customer_name ON orders (customer_name);
+        CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders (customer_id);
+        CREATE TABLE IF NOT EXISTS rollups (
+            month TEXT NOT NULL,
+            date TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (month, date)
+        );
+        CREATE TABLE IF NOT EXISTS migrated_files (
+            filename TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS customer_names (
+            order_id INTEGER PRIMARY KEY,
+            name_key TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_customer_names_key ON customer_names (name_key);
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        # Savers from any thread share the connection; SQLite's own file
+        # locking takes care of other terminals, waiting up to 30s.
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writer = GroupCommitWriter(self._write_batch)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.create_function("name_key", 1, name_key)
+
+    def close(self):
+        self.conn.close()
+
+    def has_day(self, date, month):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM orders WHERE month = ? AND date = ? LIMIT 1",
+                (month, str(date))).fetchone()
+        return row is not None
+
+    def day_files(self, date, month):
+        # Every day lives in the one database; with WAL, new commits land in the -wal file
+        return [self.path, self.path + "-wal"]
+
+    def _row(self, order_data, date, month):
+        return (month, str(date), order_data.get("Time"), order_data.get("Customer_name"),
+                str(order_data.get("Customer_id")), json.dumps(order_data))
+
+    def save(self, order_data, date, month):
+        self._writer.submit([(order_data, date, month)])
+
+    def save_many(self, records):
+        """Insert a batch of (order_data, date, month) records."""
+        self._writer.submit(list(records))
+
+    def _write_batch(self, records):
+        # The whole batch, rollups included, goes in as one transaction,
+        # i.e. one commit
+        days = {}
+        for order_data, date, month in records:
+            days.setdefault((str(date), month), []).append(order_data)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO orders (month, date, time, customer_name, customer_id, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [self._row(order_data, date, month) for order_data, date, month in records])
+            self._index_names()
+            for (date, month), orders in days.items():
+                rollup = self._load_rollup(date, month)
+                if rollup is None:
+                    rollup = self._compute_rollup(date, month)
+                else:
+                    for order_data in orders:
+                        rollup.add(order_data)
+                self._store_rollup(date, month, rollup)
+
+    # The helpers below expect self._lock to be held
+    def _index_names(self):
+        # Normalised names of the orders added since the last call, including
+        # those saved or migrated before the table existed
+        self.conn.execute(
+            "INSERT INTO customer_names (order_id, name_key) "
+            "SELECT id, name_key(customer_name) FROM orders "
+            "WHERE id > (SELECT coalesce(max(order_id), 0) FROM customer_names)")
+
+    def _load_rollup(self, date, month):
+        row = self.conn.execute(
+            "SELECT data FROM rollups WHERE month = ? AND date = ?", (month, str(date))).fetchone()
+        return DayRollup.from_dict(json.loads(row[0])) if row else None
+
+    def _compute_rollup(self, date, month):
+        cursor = self.conn.execute(
+            "SELECT data FROM orders WHERE month = ? AND date = ? ORDER BY id", (month, str(date)))
+        return DayRollup.from_orders(json.loads(data) for (data,) in cursor)
+
+    def _store_rollup(self, date, month, rollup):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO rollups (month, date, data) VALUES (?, ?, ?)",
+            (month, str(date), json.dumps(rollup.to_dict())))
+
+    def get_rollup(self, date, month):
+        with self._lock:
+            rollup = self._load_rollup(date, month)
+        if rollup is None:
+            rollup = self.rebuild_rollup(date, month)[1]
+        return rollup
+
+    def rebuild_rollup(self, date, month):
+        """Recompute a day's rollup from its orders; returns (old, new)."""
+        with self._lock, self.conn:
+            old = self._load_rollup(date, month)
+            new = self._compute_rollup(date, month)
+            if new.orders:
+                self._store_rollup(date, month, new)
+        return old, new
+
+    def list_days(self):
+        with self._lock:
+            return self.conn.execute("SELECT DISTINCT month, date FROM orders").fetchall()
+
+    def iter_day(self, date, month):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT data FROM orders WHERE month = ? AND date = ? ORDER BY id",
+                (month, str(date))).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def find_orders(self, customer_id=None, name=None, month=None):
+        """Return (month, date, order) for the orders matching a customer id and/or name."""
+        query = "SELECT orders.month, orders.date, orders.data FROM orders"
+        conditions, params = [], []
+        if name is not None:
+            query += " JOIN customer_names ON customer_names.order_id = orders.id"
+            conditions.append("customer_names.name_key = ?")
+            params.append(name_key(name))
+        if customer_id is not None:
+            conditions.append("orders.customer_id = ?")
+            params.append(str(customer_id))
+        if month is not None:
+            conditions.append("orders.month = ?")
+            params.append(month)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            if name is not None:
+                with self.conn:
+                    self._index_names()
+            rows = self.conn.execute(query + " ORDER BY orders.id", params).fetchall()
+        return [(month, date, json.loads(data)) for month, date, data in rows]
+
+    def migrate(self, directory="."):
+        """
+        Import every BakeryShop*.json / *.jsonl day file and archive from a directory.
+
+        Each file is imported in one transaction and remembered, so running
+        the migrator again only picks up files it has not seen yet.
+        Returns a list of (filename, order count) for the imported files.
+        """
+        imported = []
+        for month, date, path in list_day_files(directory):
+            name = os.path.basename(path)
+            with self._lock:
+                seen = self.conn.execute(
+                    "SELECT 1 FROM migrated_files WHERE filename = ?", (name,)).fetchone()
+            if seen:
+                continue
+            rows = [self._row(order, date, month) for order in iter_day_file(path)]
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO orders (month, date, time, customer_name, customer_id, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._index_names()
+                self.conn.execute("INSERT INTO migrated_files (filename) VALUES (?)", (name,))
+            imported.append((name, len(rows)))
+        return imported
+
+
+class HttpStore:
+    """Orders kept by an order server (orderserver.py) that several tills share."""
+
+    def __init__(self, url=DEFAULT_URL):
+        self.url = url.rstrip("/")
+
+    def _request(self, method, path, payload=None):
+        # urllib is only loaded by tills that talk to a server
+        from urllib.request import Request, urlopen
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = Request(self.url + path, data=data, method=method,
+                          headers={"Content-Type": "application/json"})
+        with urlopen(request, timeout=30) as response:
+            return json.load(response)
+
+    def has_day(self, date, month):
+        return self.get_rollup(date, month).orders > 0
+
+    def day_files(self, date, month):
+        # Nothing local to watch
+        return []
+
+    def save(self, order_data, date, month):
+        self.save_many([(order_data, date, month)])
+
+    def save_many(self, records):
+        """Send a batch of (order_data, date, month) records in one request."""
+        self._request("POST", "/orders", [{"order": order_data, "date": str(date), "month": month}
+                                          for order_data, date, month in records])
+
+    def get_rollup(self, date, month):
+        return DayRollup.from_dict(self._request("GET", f"/days/{month}/{date}/summary"))
+
+    def rebuild_rollup(self, date, month):
+        result = self._request("POST", f"/days/{month}/{date}/rebuild-rollup")
+        return (DayRollup.from_dict(result["old"]) if result["old"] else None,
+                DayRollup.from_dict(result["new"]))
+
+    def list_days(self):
+        return [tuple(day) for day in self._request("GET", "/days")]
+
+    def iter_day(self, date, month):
+        yield from self._request("GET", f"/days/{month}/{date}")
+
+    def find_orders(self, customer_id=None, name=None, month=None):
+        from urllib.parse import urlencode
+        query = urlencode({key: value for key, value in
+                           (("customer_id", customer_id), ("name", name), ("month", month))
+                           if value is not None})
+        return [(found["month"], found["date"], found["order"])
+                for found in self._request("GET", "/orders?" + query)]
+
+
+_store = None
+
+
+def get_store():
+    """Return the order store selected through the environment."""
+    global _store
+    if _store is None:
+        backend = os.environ.get("BAKERY_STORE", "journal").lower()
+        if backend == "sqlite":
+            _store = SqliteStore(os.environ.get("BAKERY_DB", DEFAULT_DB))
+        elif backend == "journal":
+            _store = JournalStore()
+        elif backend == "http":
+            _store = HttpStore(os.environ.get("BAKERY_URL", DEFAULT_URL))
+        else:
+            raise ValueError(f"Unknown BAKERY_STORE backend: {backend}")
+    return _store
+
+
+def _forget_store():
+    global _store
+    _store = None
+
+
+if hasattr(os, "register_at_fork"):
+    # SQLite connections (the sqlite store, the journal's lookup index) must
+    # not be used across fork; a forked worker opens its own store
+    os.register_at_fork(after_in_child=_forget_store)
+
+
+def day_exists(date, month):
+    """Check whether any orders were ever saved for the given day."""
+    return get_store().has_day(date, month)
+
+
+def list_days():
+    """Return every (month, date) with saved orders, in calendar order."""
+    days = [(month, str(date)) for month, date in get_store().list_days() if month in MONTHS]
+    return sorted(days, key=lambda day: (MONTHS.index(day[0]), int(day[1])))
+
+
+def day_files(date, month):
+    """Return the files backing a day; their mtime and size change whenever it does."""
+    return get_store().day_files(date, month)
+
+
+def day_signature(date, month):
+    """Return (path, mtime, size) of every existing file behind a day."""
+    signature = []
+    for path in day_files(date, month):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def signature_after_save(before, date, month, orders):
+    """
+    Return the day signature after orders were appended to a day whose
+    signature was ``before``, or None if the day's files changed in any
+    other way meanwhile (another till saved too, the day was archived, or
+    the store has no local files), so a copy of the day can not be kept.
+    """
+    after = day_signature(date, month)
+    journal = day_filename(date, month, JOURNAL_EXT)
+    written = sum(len(json.dumps(order_data)) + NEWLINE_BYTES for order_data in orders)
+    old_size = next((size for path, _, size in before if path == journal), 0)
+    new_size = next((size for path, _, size in after if path == journal), None)
+    others = [entry for entry in after if entry[0] != journal]
+    if new_size != old_size + written or others != [entry for entry in before if entry[0] != journal]:
+        return None
+    return after
+
+
+def day_rollup(date, month):
+    """Return the running totals of a day without reading its orders."""
+    return get_store().get_rollup(date, month)
+
+
+def rebuild_rollup(date, month):
+    """Recompute a day's rollup from its orders; returns (old, new)."""
+    return get_store().rebuild_rollup(date, month)
+
+
+def append_order(order_data, date, month):
+    """Persist a single order for the given day."""
+    get_store().save(order_data, date, month)
+
+
+def append_orders(records):
+    """Persist a batch of (order_data, date, month) records."""
+    get_store().save_many(records)
+
+
+def iter_orders(date, month):
+    """Yield the orders of a day in the order they were saved."""
+    return get_store().iter_day(date, month)
+
+
+def find_orders(customer_id=None, name=None, month=None):
+    """
+    Return (month, date, order) for every order with the given customer id
+    and/or customer name (case and extra spaces ignored), optionally only
+    in one month, in calendar order.
+    """
+    found = get_store().find_orders(customer_id, name, month)
+    return sorted(found, key=lambda entry: (MONTHS.index(entry[0]), int(entry[1])))
+
+
+def read_orders(date, month):
+    """Return all orders of a day as a list."""
+    return list(iter_orders(date, month))
@@ -0,0 +1,304 @@
+import os
+import re
+import zlib
+
+from orders import decode_order
+from reports import RangeSummary
+
+# A4 in millimetres; drawing calls use FPDF-style coordinates (mm, origin
+# at the top left) and are converted to PDF points when written.
+PAGE_WIDTH = 210
+PAGE_HEIGHT = 297
+PT_PER_MM = 72 / 25.4
+# Courier is monospaced: every glyph is 600/1000 of the font size wide
+CHAR_WIDTH = 0.6
+
+
+def text_width(text, size):
+    """Width in mm of a string set in Courier at the given point size."""
+    return len(text) * CHAR_WIDTH * size / PT_PER_MM
+
+
+class PdfStreamWriter:
+    """
+    Minimal PDF writer that streams every finished page to disk.
+
+    It covers what the order reports need: A4 pages, the standard Courier
+    fonts (not embedded, so limited to Windows-1252 characters), text and
+    boxes. Only the current page is held in
+    memory, plus one offset per PDF object for the cross-reference table.
+    """
+
+    CATALOG, PAGES, FONT, FONT_BOLD = 1, 2, 3, 4
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'wb')
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5
+        self.ops = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self.FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+                                b"/Encoding /WinAnsiEncoding >>")
+        self._object(self.FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold "
+                                     b"/Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def _object(self, number, body):
+        self.offsets[number] = self.position
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def _new_id(self):
+        number = self.next_id
+        self.next_id += 1
+        return number
+
+    def _end_page(self):
+        if self.ops is None:
+            return
+        self.ops, ops = None, self.ops
+        self.add_page_stream(zlib.compress("\n".join(ops).encode('cp1252')))
+
+    def add_page_stream(self, content):
+        """Write a finished page from its compressed content stream."""
+        content_id = self._new_id()
+        self._object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+                     + content + b"\nendstream")
+        page_id = self._new_id()
+        self._object(page_id, (
+            "<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+            "/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (self.PAGES, PAGE_WIDTH * PT_PER_MM, PAGE_HEIGHT * PT_PER_MM,
+               self.FONT, self.FONT_BOLD, content_id)).encode())
+        self.page_ids.append(page_id)
+
+    def add_page(self):
+        self._end_page()
+        self.ops = []
+
+    def page_no(self):
+        return len(self.page_ids) + (self.ops is not None)
+
+    def text(self, x, y, text, size=9, bold=False):
+        """Write text with its baseline at (x, y) mm."""
+        text = str(text)
+        try:
+            text.encode('cp1252')
+        except UnicodeEncodeError:
+            raise ValueError(f"can not print {text!r}: PDF reports use the standard Courier font, "
+                             f"which only has Windows-1252 (Western European) characters") from None
+        text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        self.ops.append("BT /F%d %.1f Tf %.2f %.2f Td (%s) Tj ET" % (
+            2 if bold else 1, size, x * PT_PER_MM, (PAGE_HEIGHT - y) * PT_PER_MM, text))
+
+    def rect(self, x, y, w, h):
+        """Draw the outline of a box whose top left corner is (x, y) mm."""
+        self.ops.append("%.2f %.2f %.2f %.2f re S" % (
+            x * PT_PER_MM, (PAGE_HEIGHT - y - h) * PT_PER_MM, w * PT_PER_MM, h * PT_PER_MM))
+
+    def cell(self, x, y, w, h, text, align='L', border=True, size=9, bold=False):
+        """Write text inside a box like FPDF.cell, cutting it to fit."""
+        text = str(text)
+        max_chars = int((w - 2) * PT_PER_MM / (CHAR_WIDTH * size))
+        if len(text) > max_chars:
+            text = text[:max(max_chars - 3, 0)] + "..."
+        if align == 'R':
+            tx = x + w - 1 - text_width(text, size)
+        elif align == 'C':
+            tx = x + (w - text_width(text, size)) / 2
+        else:
+            tx = x + 1
+        if border:
+            self.rect(x, y, w, h)
+        if text:
+            self.text(tx, y + h / 2 + 0.3 * size / PT_PER_MM, text, size, bold)
+
+    def close(self):
+        self._end_page()
+        kids = " ".join("%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(self.PAGES, ("<< /Type /Pages /Kids [%s] /Count %d >>"
+                                  % (kids, len(self.page_ids))).encode())
+        self._object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        xref = self.position
+        lines = ["xref", "0 %d" % self.next_id, "0000000000 65535 f "]
+        lines += ["%010d 00000 n " % self.offsets[number] for number in range(1, self.next_id)]
+        lines += ["trailer", "<< /Size %d /Root %d 0 R >>" % (self.next_id, self.CATALOG),
+                  "startxref", str(xref), "%%EOF", ""]
+        self._write("\n".join(lines).encode())
+        self.file.close()
+
+    def abort(self):
+        """Drop a report that could not be finished."""
+        self.file.close()
+        os.remove(self.filename)
+
+
+def iter_page_streams(filename):
+    """
+    Yield the compressed content stream of every page of a report.
+
+    Only understands files written by PdfStreamWriter, which all share the
+    same fonts and page setup; that is what makes copying pages this cheap.
+    """
+    with open(filename, 'rb') as file:
+        data = file.read()
+    xref = int(data[data.rindex(b"startxref") + len(b"startxref"):].split()[0])
+    entries = data[xref:].split(b"\n")
+    count = int(entries[1].split()[1])
+    offsets = [None] + [int(entry[:10]) for entry in entries[3:3 + count - 1]]
+
+    def body(number):
+        start = offsets[number]
+        return data[start:data.index(b"endobj", start)]
+
+    kids = re.search(rb"/Kids \[([^\]]*)\]", body(PdfStreamWriter.PAGES)).group(1)
+    for page_id in re.findall(rb"(\d+) 0 R", kids):
+        contents = int(re.search(rb"/Contents (\d+) 0 R", body(int(page_id))).group(1))
+        start = offsets[contents]
+        length = int(re.search(rb"/Length (\d+)", data[start:start + 100]).group(1))
+        stream = data.index(b"stream\n", start) + len(b"stream\n")
+        yield data[stream:stream + length]
+
+
+def merge_reports(filenames, output):
+    """Concatenate the pages of several reports into one PDF."""
+    pdf = PdfStreamWriter(output)
+    try:
+        for filename in filenames:
+            for content in iter_page_streams(filename):
+                pdf.add_page_stream(content)
+    except BaseException:
+        pdf.abort()
+        raise
+    pdf.close()
+
+
+class OrderReport:
+    """
+    Paginated order report written straight from an iterator of orders.
+
+    Every page repeats the title and table header and ends with a subtotal
+    of its own orders; the last page carries the summary for the whole
+    report. Orders are consumed one at a time and pages go to disk as soon
+    as they are full, so memory stays flat for any number of orders.
+    """
+
+    # (header, width in mm, alignment)
+    COLUMNS = [
+        ("Customer", 45, 'L'),
+        ("Order ID", 35, 'C'),
+        ("Time", 22, 'C'),
+        ("Order", 58, 'L'),
+        ("Total Amount", 30, 'R'),
+    ]
+    ROW_HEIGHT = 7
+    MARGIN = 10
+    TABLE_TOP = 32
+
+    def __init__(self, title, subtitle=None, with_date=False):
+        self.title = title
+        self.subtitle = subtitle
+        self.with_date = with_date
+        if with_date:
+            # Multi-day reports show the day of each order and give up some
+            # of the order description for it
+            self.columns = [("Date", 18, 'C')] + self.COLUMNS[:3] + [("Order", 40, 'L'), self.COLUMNS[4]]
+        else:
+            self.columns = list(self.COLUMNS)
+        # Room between the table header and the subtotal row at the bottom
+        body = PAGE_HEIGHT - self.MARGIN - self.TABLE_TOP - 2 * self.ROW_HEIGHT
+        self.rows_per_page = int(body // self.ROW_HEIGHT)
+        self.y = 0
+
+    def _start_page(self, pdf, table=True):
+        pdf.add_page()
+        width = PAGE_WIDTH - 2 * self.MARGIN
+        pdf.cell(self.MARGIN, self.MARGIN, width, 8, self.title, 'C', border=False, size=14, bold=True)
+        pdf.cell(self.MARGIN, self.MARGIN + 10, width, 6, self.subtitle or "", 'L', border=False, size=8)
+        pdf.cell(self.MARGIN, self.MARGIN + 10, width, 6, f"Page {pdf.page_no()}", 'R', border=False, size=8)
+        self.y = self.TABLE_TOP
+        if table:
+            self._cells(pdf, [header for header, _width, _align in self.columns], bold=True, align='C')
+
+    def _cells(self, pdf, values, bold=False, align=None):
+        x = self.MARGIN
+        for value, (_header, width, column_align) in zip(values, self.columns):
+            pdf.cell(x, self.y, width, self.ROW_HEIGHT, value, align or column_align, bold=bold, size=8)
+            x += width
+        self.y += self.ROW_HEIGHT
+
+    def _row(self, pdf, order):
+        values = [order.date or ''] if self.with_date else []
+        values += [
+            order.customer_name,
+            order.customer_id,
+            order.time,
+            order.description,
+            f"${order.bill:.2f}",
+        ]
+        self._cells(pdf, values)
+
+    def _subtotal(self, pdf, count, revenue):
+        label_width = sum(width for _header, width, _align in self.columns[:-1])
+        pdf.cell(self.MARGIN, self.y, label_width, self.ROW_HEIGHT,
+                 f"Page subtotal: {count} orders", 'R', bold=True, size=8)
+        pdf.cell(self.MARGIN + label_width, self.y, self.columns[-1][1], self.ROW_HEIGHT,
+                 f"${revenue:.2f}", 'R', bold=True, size=8)
+        self.y += self.ROW_HEIGHT
+
+    def write(self, orders, filename, days=0, show_rows=True, summary=None):
+        """
+        Write the report for an iterable of orders (Orders or stored dicts)
+        to ``filename``.
+
+        With show_rows=False only the summary is written. Orders are added
+        to ``summary`` if one is given (e.g. built from daily rollups).
+        Returns the RangeSummary of the report.
+        """
+        if summary is None:
+            summary = RangeSummary()
+            summary.days = days
+        pdf = PdfStreamWriter(filename)
+        try:
+            rows_left = 0
+            page_count = 0
+            page_revenue = 0.0
+            for order in orders:
+                order = decode_order(order)
+                summary.add(order)
+                if not show_rows:
+                    continue
+                if rows_left == 0:
+                    if page_count:
+                        self._subtotal(pdf, page_count, page_revenue)
+                    self._start_page(pdf)
+                    rows_left = self.rows_per_page
+                    page_count = 0
+                    page_revenue = 0.0
+                self._row(pdf, order)
+                rows_left -= 1
+                page_count += 1
+                page_revenue += order.bill
+            if page_count:
+                self._subtotal(pdf, page_count, page_revenue)
+
+            if pdf.page_no() == 0 or self.y + 30 > PAGE_HEIGHT - self.MARGIN:
+                self._start_page(pdf, table=False)
+            self.y += 6
+            pdf.text(self.MARGIN, self.y, "Summary", size=11, bold=True)
+            self.y += 3
+            for line in summary.lines():
+                if self.y + 5 > PAGE_HEIGHT - self.MARGIN:
+                    self._start_page(pdf, table=False)
+                self.y += 5
+                pdf.text(self.MARGIN, self.y, line, size=9)
+        except BaseException:
+            pdf.abort()
+            raise
+        pdf.close()
+        return summary
@@ -0,0 +1,159 @@
+"""
+Content-addressed cache of generated QR images.
+
+An image is stored under the SHA-256 of everything that decides its
+pixels (data, version, error correction, border, box size, colours and
+file format), so the same payload is only rendered once, by the CLI, its
+batch workers and the Kivy app alike. Outputs are hard links to the cached
+file where the filesystem allows it, copies otherwise. The cache is
+bounded in size; the least recently used images are evicted first.
+
+    QR_CACHE_DIR=<dir>   where the images are kept (default: qr_cache)
+    QR_CACHE_MB=<MB>     size limit, 0 turns the cache off (default: 256)
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+DEFAULT_CACHE_DIR = "qr_cache"
+DEFAULT_CACHE_MB = 256
+# Eviction goes a little below the limit so it does not run on every save
+EVICT_TO = 0.9
+
+
+def cache_key(data, version, error_correction, border, box_size, fill_color, back_color, fmt):
+    """Return the hex digest that names an image in the cache."""
+    fields = [data, version, error_correction, border, box_size, str(fill_color), str(back_color), fmt.lower()]
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+
+def pil_format(fmt):
+    """PIL format name of a file extension."""
+    return "JPEG" if fmt.lower() in ("jpg", "jpeg") else fmt.upper()
+
+
+def _tmp_name(path):
+    # Unique per process and call, so concurrent writers never share one
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+class QRCache:
+    """Images named by their cache key, spread over 256 subdirectories."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MB << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bytes in the cache, counted on the first save
+        self._size = None
+
+    def path(self, key, fmt):
+        return os.path.join(self.directory, key[:2], f"{key}.{fmt.lower()}")
+
+    def get(self, key, fmt):
+        """Return the cached file for a key, or None; a hit counts as a use for the LRU."""
+        path = self.path(key, fmt)
+        try:
+            # Last use is the file's mtime: atime is often not kept up to date
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put_image(self, key, fmt, image):
+        """Save a PIL image under its key and return the cached file."""
+        path = self.path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = _tmp_name(path)
+        # The format is given explicitly, PIL cannot guess it from ".tmp"
+        image.save(tmp, format=pil_format(fmt))
+        size = os.path.getsize(tmp)
+        os.replace(tmp, path)
+        if self._size is None:
+            self._size = self.disk_usage()
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+        return path
+
+    def export(self, cached, output_name):
+        """
+        Put a cached file at output_name. Outputs are always replaced, never
+        written into, so a hard-linked output can not change the cache.
+        """
+        try:
+            if os.path.samefile(cached, output_name):
+                # Already linked (renaming a link over itself does nothing)
+                return
+        except OSError:
+            pass
+        tmp = _tmp_name(output_name)
+        try:
+            os.link(cached, tmp)
+        except OSError:
+            # Other filesystem, or links not supported
+            shutil.copyfile(cached, tmp)
+        os.replace(tmp, output_name)
+
+    def entries(self):
+        """Yield (mtime, size, path) of every cached file."""
+        try:
+            subdirs = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def disk_usage(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove the least recently used files until the cache is below its limit."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                # Evicted by another process meanwhile
+                pass
+            total -= size
+        self._size = total
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_cache = None
+
+
+def get_cache():
+    """Return the cache configured through the environment, or None when it is turned off."""
+    global _cache
+    max_mb = float(os.environ.get("QR_CACHE_MB", DEFAULT_CACHE_MB))
+    if max_mb <= 0:
+        return None
+    directory = os.environ.get("QR_CACHE_DIR", DEFAULT_CACHE_DIR)
+    if _cache is None or _cache.directory != directory:
+        _cache = QRCache(directory, int(max_mb * (1 << 20)))
+    return _cache
@@ -1,32 +1,60 @@
-import qrcode
 import argparse
+import csv
+import json
 import os
 import random
-import webbrowser
-from PIL import Image
+import sys
+import time
 from datetime import datetime
-import validators
 import logging
 
+from qrcache import cache_key, get_cache, pil_format
+
+# qrcode, validators and webbrowser are imported inside the functions that
+# use them, so that e.g. --help does not pay for loading them.
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     filename='qrcode_generator.log'
 )
 
+# Pixels per QR module
+BOX_SIZE = 10
+# Batch jobs queued per worker process; enough to keep every worker busy
+# without holding the whole batch in memory
+JOBS_PER_WORKER = 8
+# Failed items listed at the end of a batch (all of them go to the log)
+MAX_LISTED_ERRORS = 20
+# Seconds between checkpoint writes of a batch run
+CHECKPOINT_INTERVAL = 1.0
+
 def validate_url(url):
     """Validate if the input is a URL."""
+    import validators
     if validators.url(url):
         return True
     return False
 
+def error_correction_level(level):
+    """Map an L/M/Q/H letter to the qrcode error correction constant."""
+    import qrcode
+    ec_map = {
+        "L": qrcode.constants.ERROR_CORRECT_L,
+        "M": qrcode.constants.ERROR_CORRECT_M,
+        "Q": qrcode.constants.ERROR_CORRECT_Q,
+        "H": qrcode.constants.ERROR_CORRECT_H,
+    }
+    return ec_map.get(level, qrcode.constants.ERROR_CORRECT_H)
+
 def generate_qr_code(data, 
                     output_name=None, 
                     size=10, 
                     border=4, 
                     fill_color="black", 
                     back_color="white", 
-                    error_correction=qrcode.constants.ERROR_CORRECT_H):
+                    error_correction=None,
+                    cache=None):
     """
     Generate a QR code with customized parameters
     
@@ -37,31 +65,43 @@ def generate_qr_code(data,
     - border: Border size (quiet zone)
     - fill_color: Color of the QR code modules
     - back_color: Background color
-    - error_correction: Error correction level
+    - error_correction: Error correction level (default: H)
+    - cache: QRCache to reuse images from (default: the one configured
+      through QR_CACHE_DIR / QR_CACHE_MB, see qrcache.py); False for none
     
     Returns:
     - The filename of the saved QR code image
     """
+    import qrcode
+    if error_correction is None:
+        error_correction = qrcode.constants.ERROR_CORRECT_H
     try:
         if output_name is None:
             num = random.randint(1000, 9999)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_name = f"qrimg_{timestamp}_{num}.png"
-        elif not output_name.endswith(('.png', '.jpg', '.jpeg')):
-            output_name += ".png"
-            
-        qr = qrcode.QRCode(
-            version=size,
-            error_correction=error_correction,
-            box_size=10,
-            border=border,
-        )
-        
-        qr.add_data(data)
-        qr.make(fit=True)
+        else:
+            output_name = image_filename(output_name)
         
-        img = qr.make_image(fill_color=fill_color, back_color=back_color)
+        if cache is None:
+            cache = get_cache()
+        if cache:
+            fmt = output_name.rsplit(".", 1)[1]
+            key = cache_key(data, size, error_correction, border, BOX_SIZE, fill_color, back_color, fmt)
+            cached = cache.get(key, fmt)
+            if cached is not None:
+                try:
+                    cache.export(cached, output_name)
+                except FileNotFoundError:
+                    # Evicted by another process since get(); render it again
+                    cached = None
+            if cached is None:
+                cache.export(cache.put_image(key, fmt, render_qr_image(
+                    data, size, border, fill_color, back_color, error_correction)), output_name)
+            logging.info(f"QR code generated successfully: {output_name}")
+            return output_name
         
+        img = render_qr_image(data, size, border, fill_color, back_color, error_correction)
         img.save(output_name)
         logging.info(f"QR code generated successfully: {output_name}")
         
@@ -70,6 +110,400 @@ def generate_qr_code(data,
         logging.error(f"Error generating QR code: {str(e)}")
         raise
 
+def image_filename(output_name):
+    """Output name with an image extension (.png unless it has one)."""
+    if not output_name.endswith(('.png', '.jpg', '.jpeg')):
+        output_name += ".png"
+    return output_name
+
+def encode_qr_code(data, fmt, size, border, fill_color, back_color, error_correction, cache=None):
+    """
+    Return the encoded image file (png, jpg) of a QR code as bytes, for
+    outputs that are not a file of their own (see qrsinks.py).
+    """
+    if cache is None:
+        cache = get_cache()
+    if cache:
+        key = cache_key(data, size, error_correction, border, BOX_SIZE, fill_color, back_color, fmt)
+        cached = cache.get(key, fmt)
+        if cached is None:
+            cached = cache.put_image(key, fmt, render_qr_image(
+                data, size, border, fill_color, back_color, error_correction))
+        try:
+            with open(cached, 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            # Evicted by another process in between; render it here
+            pass
+    import io
+    buffer = io.BytesIO()
+    render_qr_image(data, size, border, fill_color, back_color, error_correction).save(
+        buffer, format=pil_format(fmt))
+    return buffer.getvalue()
+
+def render_qr_image(data, size, border, fill_color, back_color, error_correction):
+    """Build the PIL image of a QR code."""
+    import qrcode
+    qr = qrcode.QRCode(
+        version=size,
+        error_correction=error_correction,
+        box_size=BOX_SIZE,
+        border=border,
+    )
+    
+    qr.add_data(data)
+    qr.make(fit=True)
+    
+    # Same pixels as qr.make_image(); drawn with NumPy once a batch loaded it
+    from qrraster import rasterize
+    return rasterize(qr, fill_color, back_color)
+
+def read_batch_rows(file, fmt):
+    """
+    Yields (line number, row dict or None) from a batch stream, one line at
+    a time: plain text (one data per line), CSV with a header, or JSONL.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if fmt == "text":
+            yield line_num, {"data": line}
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield line_num, row if isinstance(row, dict) else None
+
+def batch_job(number, row, defaults):
+    """
+    Turns a batch row into a batch_item() job. Columns: data (required),
+    output, version, border, error_correction, fill and background; missing
+    ones take the command-line values. A row that cannot be used becomes a
+    job that carries its error.
+    """
+    if row is None:
+        return number, "", None, None, "not a valid record"
+    data = str(row.get("data") or "").strip()
+    options = dict(defaults)
+    try:
+        if not data:
+            raise ValueError("no data")
+        for column, option, low, high in (("version", "size", 1, 40), ("border", "border", 0, 100)):
+            value = str(row.get(column) or "").strip()
+            if value:
+                if not value.isdigit() or not low <= int(value) <= high:
+                    raise ValueError(f"invalid {column}: {row[column]!r}")
+                options[option] = int(value)
+        level = str(row.get("error_correction") or "").strip().upper()
+        if level:
+            if level not in ("L", "M", "Q", "H"):
+                raise ValueError(f"invalid error_correction: {row['error_correction']!r}")
+            options["error_correction"] = level
+        for column, option in (("fill", "fill_color"), ("background", "back_color")):
+            if row.get(column):
+                options[option] = str(row[column]).strip()
+    except ValueError as e:
+        return number, data, None, None, str(e)
+    output_name = str(row.get("output") or "").strip() or f"batch_qr_{number}"
+    return number, data, output_name, options, None
+
+def batch_item(job, encode=False, fmt=None):
+    """
+    Generate one QR code of a batch; runs in a worker process.
+    Returns (number, output_name, error message or None, data, cache hit,
+    image), so one bad line does not stop the batch. The image is None
+    when it was saved to output_name; with encode it is not saved but
+    returned as the bytes of an image file (fmt, or the output name's
+    format) for a batch sink.
+    """
+    number, data, output_name, options, error = job
+    if error:
+        return number, output_name, error, data, False, None
+    cache = get_cache()
+    hits = cache.hits if cache else 0
+    try:
+        options = dict(options, error_correction=error_correction_level(options["error_correction"]))
+        image = None
+        if encode:
+            output_name = image_filename(output_name)
+            image = encode_qr_code(data, fmt or output_name.rsplit(".", 1)[1], cache=cache or False, **options)
+        else:
+            output_name = generate_qr_code(data=data, output_name=output_name, cache=cache or False, **options)
+        return number, output_name, None, data, bool(cache) and cache.hits > hits, image
+    except Exception as e:
+        return number, output_name, str(e) or type(e).__name__, data, False, None
+
+def load_numpy():
+    """Batches render many codes, which pays for loading NumPy (see qrraster.py)."""
+    try:
+        import numpy
+    except ImportError:
+        pass
+
+def init_worker():
+    """Worker initializer: Ctrl-C is handled by the main process only."""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    load_numpy()
+
+def iter_batch_results(jobs, workers, encode=False, fmt=None):
+    """
+    Yield batch_item() results in the order of the jobs. With several
+    workers only a bounded number of jobs is queued at a time.
+    """
+    if workers <= 1:
+        load_numpy()
+        for job in jobs:
+            yield batch_item(job, encode, fmt)
+        return
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        pending = deque()
+        try:
+            for job in jobs:
+                pending.append(pool.submit(batch_item, job, encode, fmt))
+                if len(pending) >= workers * JOBS_PER_WORKER:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Interrupted: drop what has not started yet
+            for future in pending:
+                future.cancel()
+
+def count_lines(path):
+    """Count the lines of a file without decoding it."""
+    count = 0
+    last = b"\n"
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    return count + (last != b"\n")
+
+class BatchCheckpoint:
+    """
+    Progress of a batch run, saved next to its input so an interrupted or
+    crashed run can be resumed. Results come back in input order, so the
+    last line whose result is in is all that has to be remembered; lines
+    that were still running are simply generated again.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = {"input": os.path.abspath(source), "size": os.path.getsize(source)}
+        self.last_saved = time.perf_counter()
+
+    def load(self):
+        """Return the saved state, or None; ValueError if it belongs to another input."""
+        try:
+            with open(self.path, 'r') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            raise ValueError(f"unreadable checkpoint {self.path}")
+        if state.get("source") != self.source:
+            raise ValueError(f"{self.path} was written for another or a changed input file")
+        return state
+
+    def save(self, line, generated, failed, force=False, sink=None):
+        now = time.perf_counter()
+        if not force and now - self.last_saved < CHECKPOINT_INTERVAL:
+            return
+        self.last_saved = now
+        state = {"source": self.source, "line": line, "generated": generated, "failed": failed}
+        if sink:
+            # Where the sink's output of the lines up to here ends
+            state["sink"] = {"path": os.path.abspath(sink.path), "position": sink.commit()}
+        with open(self.path + ".tmp", 'w') as file:
+            json.dump(state, file)
+        os.replace(self.path + ".tmp", self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class BatchProgress:
+    """Live progress line of a batch run, plus the final summary."""
+
+    def __init__(self, total_lines, workers, stream=sys.stdout):
+        self.total_lines = total_lines
+        self.workers = workers
+        self.stream = stream
+        self.interactive = stream.isatty()
+        # Rewrite one line on a terminal; print a line now and then otherwise
+        self.interval = 0.2 if self.interactive else 5.0
+        self.line = 0
+        self.done = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self.errors = []
+        self.start = self.last_shown = time.perf_counter()
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def update(self, number, output_name, error, data="", cache_hit=False):
+        self.line = number
+        self.done += 1
+        self.cache_hits += cache_hit
+        if error:
+            self.failed += 1
+            if len(self.errors) < MAX_LISTED_ERRORS:
+                self.errors.append((number, data, error))
+            logging.error(f"Batch line {number} failed: {error}")
+        now = time.perf_counter()
+        if now - self.last_shown >= self.interval:
+            self.last_shown = now
+            self.show()
+
+    def show(self):
+        position = f"line {self.line}"
+        if self.total_lines:
+            position += f"/{self.total_lines} {100 * self.line / self.total_lines:5.1f}%"
+        line = f"[{position}] {self.done} done  {self.rate():.0f} QR/s  {self.failed} failed"
+        if self.interactive:
+            self.stream.write("\r" + line)
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def finish(self, interrupted=False):
+        if self.interactive:
+            self.stream.write("\n")
+        elapsed = time.perf_counter() - self.start
+        generated = self.done - self.failed
+        print(f"{'Interrupted' if interrupted else 'Batch processing completed'}: "
+              f"{generated} QR codes generated in {elapsed:.2f}s ({self.rate():.0f} QR/s) "
+              f"using {self.workers} workers", file=self.stream)
+        if get_cache() and generated:
+            print(f"QR cache: {self.cache_hits} hits, {generated - self.cache_hits} misses "
+                  f"({100 * self.cache_hits / generated:.1f}% hit rate)", file=self.stream)
+        if self.failed:
+            print(f"{self.failed} lines failed:", file=self.stream)
+            for number, data, error in self.errors:
+                print(f"  line {number}: {error} - Data: {data[:30]}", file=self.stream)
+            if self.failed > len(self.errors):
+                print(f"  ... and {self.failed - len(self.errors)} more (see qrcode_generator.log)",
+                      file=self.stream)
+
+def run_batch(args):
+    """
+    Generate one QR code per row of a batch file, or stdin ("-"), streamed
+    on a pool of worker processes. Plain text files hold one data per line;
+    CSV and JSONL rows may also set output, version, border,
+    error_correction, fill and background. Without an output, line N is
+    saved as batch_qr_N.png. Instead of separate files, --archive writes
+    every image into one ZIP or TAR and --sprites packs them into sprite
+    sheets with a JSON index (see qrsinks.py). A checkpoint next to the
+    input lets --resume continue an interrupted run.
+    Example:
+        python qrgenerator.py --batch input_list.txt --workers 4
+        python qrgenerator.py --batch labels.csv --resume
+        python qrgenerator.py --batch labels.csv --archive labels.zip
+        python qrgenerator.py --batch labels.csv --sprites labels
+    """
+    fmt = args.batch_format
+    if fmt is None:
+        lower = args.batch.lower()
+        fmt = "csv" if lower.endswith(".csv") else "jsonl" if lower.endswith((".jsonl", ".ndjson")) else "text"
+    from_stdin = args.batch == "-"
+
+    skip = 0
+    state = None
+    checkpoint = None
+    if not from_stdin:
+        try:
+            checkpoint = BatchCheckpoint(args.checkpoint or args.batch + ".checkpoint", args.batch)
+            state = checkpoint.load() if args.resume else None
+        except (OSError, ValueError) as e:
+            print(f"Error in batch processing: {str(e)}")
+            return
+        if state:
+            skip = state["line"]
+            print(f"Resuming after line {skip} ({state['generated']} generated, {state['failed']} failed before)")
+    elif args.resume:
+        print("Error: --resume needs a batch file, not stdin.")
+        return
+
+    from qrsinks import open_sink
+    target = args.archive or args.sprites
+    resume_at = None
+    if skip and target:
+        saved = state.get("sink") or {}
+        if saved.get("path") != os.path.abspath(target) or saved.get("position") is None:
+            print(f"Error: {checkpoint.path} has no position in {target} to resume at "
+                  f"(compressed archives can not be resumed).")
+            return
+        resume_at = saved["position"]
+    try:
+        sink = open_sink(args.archive, args.sprites, args.sheet_size, resume_at)
+    except (OSError, ValueError) as e:
+        print(f"Error in batch processing: {str(e)}")
+        return
+
+    defaults = dict(size=args.size, border=args.border, fill_color=args.fill,
+                    back_color=args.background, error_correction=args.error_correction)
+    workers = args.workers or os.cpu_count() or 1
+    file = sys.stdin if from_stdin else open(args.batch, 'r', newline='')
+    jobs = (batch_job(number, row, defaults) for number, row in read_batch_rows(file, fmt) if number > skip)
+
+    print(f"Processing {'stdin' if from_stdin else args.batch} ({fmt}) in batch mode"
+          f"{f' into {target}' if target else ''}...")
+    progress = BatchProgress(None if from_stdin else count_lines(args.batch), workers)
+    interrupted = False
+    # Sprite sheets are always PNG
+    results = iter_batch_results(jobs, workers, encode=sink is not None, fmt="png" if args.sprites else None)
+    generated_before = state["generated"] if skip else 0
+    failed_before = state["failed"] if skip else 0
+    if checkpoint and args.sprites:
+        # A saved sheet holds every line before the one being placed
+        sink.on_flush = lambda: checkpoint.save(progress.line or skip,
+                                                generated_before + progress.done - progress.failed,
+                                                failed_before + progress.failed, force=True, sink=sink)
+    try:
+        for number, output_name, error, data, cache_hit, image in results:
+            if sink and not error:
+                sink.add(number, output_name, image, data)
+            progress.update(number, output_name, error, data, cache_hit)
+            # Not while the sink still buffers results, those are lost in a crash
+            if checkpoint and not (sink and sink.pending):
+                checkpoint.save(number, generated_before + progress.done - progress.failed,
+                                failed_before + progress.failed, sink=sink)
+    except KeyboardInterrupt:
+        interrupted = True
+        results.close()
+    except OSError as e:
+        print(f"\nError writing {target}: {str(e)}")
+        interrupted = True
+        results.close()
+    finally:
+        if file is not sys.stdin:
+            file.close()
+        if sink:
+            sink.close()
+    progress.finish(interrupted)
+    if state:
+        print(f"Including earlier runs: {generated_before + progress.done - progress.failed} generated, "
+              f"{failed_before + progress.failed} failed")
+    if checkpoint:
+        if interrupted:
+            checkpoint.save(progress.line or skip, generated_before + progress.done - progress.failed,
+                            failed_before + progress.failed, force=True, sink=sink)
+            print(f"Run again with --resume to continue after line {progress.line or skip}.")
+        else:
+            checkpoint.remove()
+
 def interactive_mode():
     """Run the QR code generator in interactive mode."""
     print("=" * 50)
@@ -114,14 +548,6 @@ def interactive_mode():
     fill_color = input("Fill color (default: black): ") or "black"
     back_color = input("Background color (default: white): ") or "white"
     
-  
-    error_correction_options = {
-        "L": qrcode.constants.ERROR_CORRECT_L,
-        "M": qrcode.constants.ERROR_CORRECT_M, 
-        "Q": qrcode.constants.ERROR_CORRECT_Q,  
-        "H": qrcode.constants.ERROR_CORRECT_H,  
-    }
-    
     print("Error correction levels:")
     print("L - Low (7% recovery)")
     print("M - Medium (15% recovery)")
@@ -129,7 +555,7 @@ def interactive_mode():
     print("H - High (30% recovery)")
     ec_input = input("Choose error correction level (L/M/Q/H, default: H): ").upper()
     
-    error_correction = error_correction_options.get(ec_input, qrcode.constants.ERROR_CORRECT_H)
+    error_correction = error_correction_level(ec_input)
     
     try:
         output_file = generate_qr_code(
@@ -146,6 +572,7 @@ def interactive_mode():
         
         if input("Would you like to open the QR code? (y/n): ").lower() == 'y':
             try:
+                import webbrowser
                 abs_path = os.path.abspath(output_file)
                 webbrowser.open(f"file://{abs_path}")
             except Exception as e:
@@ -168,48 +595,40 @@ def parse_arguments():
                         choices=["L", "M", "Q", "H"], 
                         default="H", 
                         help="Error correction level")
-    parser.add_argument("--batch", help="Path to a text file with URLs/text to encode (one per line)")
+    parser.add_argument("--batch", help="Batch file: text (one URL/text per line), CSV or JSONL rows, or - for stdin")
+    parser.add_argument("--batch-format", choices=["text", "csv", "jsonl"],
+                        help="Batch file format (default: from the file extension, text otherwise)")
+    parser.add_argument("--checkpoint", help="Checkpoint file of a batch run (default: <batch file>.checkpoint)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted batch run from its checkpoint")
+    parser.add_argument("--cache-dir", help="Directory of the QR image cache (default: qr_cache, or $QR_CACHE_DIR)")
+    parser.add_argument("--cache-size", type=float, help="Size limit of the QR image cache in MB (default: 256)")
+    parser.add_argument("--no-cache", action="store_true", help="Always render, without the QR image cache")
+    sinks = parser.add_mutually_exclusive_group()
+    sinks.add_argument("--archive",
+                       help="Write the batch images into one archive (.zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz)")
+    sinks.add_argument("--sprites", metavar="PREFIX",
+                       help="Pack the batch images into sprite sheets PREFIX_0001.png, ... indexed in PREFIX.jsonl")
+    parser.add_argument("--sheet-size", type=int, default=4096,
+                        help="Largest width and height of a sprite sheet in pixels (default: 4096)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Processes generating batch QR codes (default: CPU count)")
     
     return parser.parse_args()
 
 def main():
     """Main function to run the QR code generator."""
     args = parse_arguments()
-    
-    ec_map = {
-        "L": qrcode.constants.ERROR_CORRECT_L,
-        "M": qrcode.constants.ERROR_CORRECT_M,
-        "Q": qrcode.constants.ERROR_CORRECT_Q,
-        "H": qrcode.constants.ERROR_CORRECT_H,
-    }
+    # Through the environment, so batch worker processes see the same cache
+    if args.cache_dir:
+        os.environ["QR_CACHE_DIR"] = args.cache_dir
+    if args.cache_size is not None:
+        os.environ["QR_CACHE_MB"] = str(args.cache_size)
+    if args.no_cache:
+        os.environ["QR_CACHE_MB"] = "0"
     
     if args.batch:
-        try:
-            with open(args.batch, 'r') as f:
-                lines = f.readlines()
-                
-            print(f"Processing {len(lines)} QR codes in batch mode...")
-            for i, line in enumerate(lines):
-                data = line.strip()
-                if data:
-                    output_name = f"batch_qr_{i+1}.png"
-                    generate_qr_code(
-                        data=data,
-                        output_name=output_name,
-                        size=args.size,
-                        border=args.border,
-                        fill_color=args.fill,
-                        back_color=args.background,
-                        error_correction=ec_map[args.error_correction]
-                    )
-                    print(f"Generated: {output_name} - Data: {data[:30]}...")
-            
-            print("Batch processing completed!")
-            return
-                
-        except Exception as e:
-            print(f"Error in batch processing: {str(e)}")
-            return
+        run_batch(args)
+        return
     
     if args.data:
         try:
@@ -220,7 +639,7 @@ def main():
                 border=args.border,
                 fill_color=args.fill,
                 back_color=args.background,
-                error_correction=ec_map[args.error_correction]
+                error_correction=error_correction_level(args.error_correction)
             )
             print(f"QR Code generated successfully: {output_file}")
             return
@@ -0,0 +1,69 @@
+"""
+Fast rasteriser for QR codes.
+
+qrcode's PIL image factory draws every dark module as its own rectangle.
+rasterize() instead takes the module matrix (qr.get_matrix(), border
+included), blows each module up to a box_size square with NumPy and hands
+PIL the finished buffer in one call; coloured codes go in as a two-colour
+palette image that PIL converts in C. The image has the same mode and pixels as qr.make_image():
+
+    fill / back         mode   pixels
+    black / white       "1"    0 / 255
+    any / transparent   RGBA   fill / (0, 0, 0, 0)
+    anything else       RGB    fill / back
+
+Importing NumPy takes longer than drawing a single code, so by default
+rasterize() only uses it once it is loaded anyway; batch workers load it
+up front. Otherwise, and without NumPy, it falls back to qr.make_image().
+"""
+import sys
+
+from PIL import Image, ImageColor
+
+
+def _colour(colour, mode):
+    if isinstance(colour, str):
+        return ImageColor.getcolor(colour, mode)
+    colour = tuple(colour)
+    if mode == "RGBA" and len(colour) == 3:
+        colour += (255,)
+    return colour
+
+
+def image_mode(fill_color, back_color):
+    """Return (mode, fill, back) the way qrcode's PilImage picks them."""
+    fill = fill_color.lower() if isinstance(fill_color, str) else fill_color
+    back = back_color.lower() if isinstance(back_color, str) else back_color
+    if fill == "black" and back == "white":
+        return "1", 0, 255
+    if back == "transparent":
+        return "RGBA", _colour(fill, "RGBA"), (0, 0, 0, 0)
+    return "RGB", _colour(fill, "RGB"), _colour(back, "RGB")
+
+
+def rasterize(qr, fill_color="black", back_color="white", use_numpy=None):
+    """
+    Return the PIL image of a made QRCode, as qr.make_image() would draw it.
+    use_numpy=None uses NumPy only if it is already imported.
+    """
+    if use_numpy is None:
+        use_numpy = "numpy" in sys.modules
+    try:
+        if not use_numpy:
+            raise ImportError
+        import numpy as np
+    except ImportError:
+        return qr.make_image(fill_color=fill_color, back_color=back_color).get_image()
+    mode, fill, back = image_mode(fill_color, back_color)
+    box = qr.box_size
+    modules = np.array(qr.get_matrix(), dtype=bool)
+    pixels = modules.repeat(box, axis=0).repeat(box, axis=1)
+    size = pixels.shape[1], pixels.shape[0]
+    if mode == "1":
+        # One bit per pixel, 1 is white; rows are padded to whole bytes
+        return Image.frombytes("1", size, np.packbits(~pixels, axis=1).tobytes())
+    # Palette index 0 is the background, 1 the fill; expanding the pixels
+    # through a NumPy palette is several times slower than PIL's convert()
+    image = Image.frombytes("P", size, pixels.view(np.uint8).tobytes())
+    image.putpalette(bytes(back + fill), rawmode=mode)
+    return image.convert(mode)
@@ -0,0 +1,290 @@
+"""
+Output targets of a QR batch besides one file per image.
+
+    ZipSink     every image as a member of one .zip (stored, PNG and JPEG
+                do not compress any further)
+    TarSink     every image as a member of one .tar, .tar.gz/.tgz,
+                .tar.bz2 or .tar.xz
+    SpriteSink  images packed into PNG sprite sheets <prefix>_0001.png,
+                <prefix>_0002.png, ... with an index <prefix>.jsonl
+                holding one {"line", "name", "data", "sheet", "x", "y",
+                "width", "height"} object per image
+
+Images are written as they come in, so memory does not grow with the
+batch: a sprite sink holds at most one sheet, a tar sink nothing (a zip
+keeps one small record per member, which its central directory needs
+when it is closed).
+
+A crashed run leaves a zip without its central directory, a tar without
+its end blocks, or sheets and index lines the checkpoint does not know
+about. So commit() syncs what was written to disk and returns its
+position: the end of the last member, or the size of the sprite index.
+The batch checkpoint stores it, and a resumed run opens the sink at it,
+cutting off whatever came after. Lines past the checkpoint are generated
+again, and written once. Compressed tars can not be cut, so they can
+not be resumed.
+"""
+import io
+import json
+import os
+import struct
+import tarfile
+import time
+import zipfile
+
+# Largest width and height of a sprite sheet in pixels
+DEFAULT_SHEET_SIZE = 4096
+TAR_EXTENSIONS = {".tar": "", ".tar.gz": "gz", ".tgz": "gz", ".tar.bz2": "bz2", ".tar.xz": "xz"}
+# Local file header of a zip member, up to its name and extra field
+ZIP_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+
+def member_name(output_name):
+    """Archive member of an output name: relative, without '.' or '..' parts."""
+    parts = [part for part in output_name.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+    return "/".join(parts) or "qr.png"
+
+
+def open_at(path, position):
+    """Open a file written up to position to continue there; ValueError if it is shorter."""
+    file = open(path, 'r+b')
+    if os.fstat(file.fileno()).st_size < position:
+        file.close()
+        raise ValueError(f"{path} is shorter than at the checkpoint, it was changed since")
+    file.truncate(position)
+    file.seek(position)
+    return file
+
+
+def sync(file):
+    file.flush()
+    os.fsync(file.fileno())
+
+
+class ZipSink:
+    pending = 0
+
+    def __init__(self, path, resume_at=None):
+        self.path = path
+        if resume_at is None:
+            self._file = open(path, 'w+b')
+            members = []
+        else:
+            self._file = open_at(path, resume_at)
+            members = self._read_members(resume_at)
+            self._file.seek(resume_at)
+        self._zip = zipfile.ZipFile(self._file, "w", zipfile.ZIP_STORED)
+        # The members before the cut still belong in the central directory
+        self._zip.filelist.extend(members)
+        self._zip.NameToInfo.update((info.filename, info) for info in members)
+        self.position = self._file.tell()
+
+    def _read_members(self, end):
+        """ZipInfo of every member from the local headers before end."""
+        members = []
+        offset = 0
+        while offset < end:
+            self._file.seek(offset)
+            header = self._file.read(ZIP_HEADER.size)
+            if len(header) < ZIP_HEADER.size:
+                raise ValueError(f"{self.path} is damaged before the checkpoint")
+            (signature, _, _, flags, compression, mtime, mdate,
+             crc, compressed_size, size, name_length, extra_length) = ZIP_HEADER.unpack(header)
+            # This sink only writes members with their sizes in the local header
+            if signature != zipfile.stringFileHeader or flags & 0x08 or compressed_size == 0xFFFFFFFF:
+                raise ValueError(f"{self.path} is damaged before the checkpoint")
+            name = self._file.read(name_length).decode("utf-8" if flags & 0x800 else "cp437")
+            info = zipfile.ZipInfo(name, ((mdate >> 9) + 1980, (mdate >> 5) & 15, mdate & 31,
+                                          mtime >> 11, (mtime >> 5) & 63, (mtime & 31) * 2))
+            info.flag_bits, info.compress_type, info.CRC = flags, compression, crc
+            info.compress_size, info.file_size = compressed_size, size
+            info.extra = self._file.read(extra_length)
+            info.header_offset = offset
+            members.append(info)
+            offset += ZIP_HEADER.size + name_length + extra_length + compressed_size
+        if offset != end:
+            raise ValueError(f"{self.path} is damaged before the checkpoint")
+        return members
+
+    def add(self, number, output_name, image, data):
+        info = zipfile.ZipInfo(member_name(output_name), time.localtime()[:6])
+        self._zip.writestr(info, image)
+        self.position = self._file.tell()
+
+    def commit(self):
+        """Sync the members written so far; returns where they end."""
+        if not self._file.closed:
+            sync(self._file)
+        return self.position
+
+    def close(self):
+        try:
+            self._zip.close()
+            sync(self._file)
+        finally:
+            self._file.close()
+
+
+class TarSink:
+    pending = 0
+
+    def __init__(self, path, resume_at=None):
+        self.path = path
+        compression = next(TAR_EXTENSIONS[ext] for ext in sorted(TAR_EXTENSIONS, key=len, reverse=True)
+                           if path.lower().endswith(ext))
+        self._file = None
+        if compression:
+            if resume_at is not None:
+                raise ValueError(f"can not resume the compressed archive {path}, use a .tar to resume")
+            self._tar = tarfile.open(path, "w:" + compression)
+        else:
+            self._file = open(path, 'w+b') if resume_at is None else open_at(path, resume_at)
+            # Writes from the current position, after the members before the cut
+            self._tar = tarfile.open(fileobj=self._file, mode="w")
+        self.position = resume_at or 0
+
+    def add(self, number, output_name, image, data):
+        info = tarfile.TarInfo(member_name(output_name))
+        info.size = len(image)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(image))
+        # TarFile remembers every member it wrote, which would grow with the batch
+        self._tar.members = []
+        self.position = self._tar.offset
+
+    def commit(self):
+        """Sync the members written so far; returns where they end, None if compressed."""
+        if self._file is None:
+            return None
+        if not self._file.closed:
+            sync(self._file)
+        return self.position
+
+    def close(self):
+        try:
+            self._tar.close()
+            if self._file:
+                sync(self._file)
+        finally:
+            if self._file:
+                self._file.close()
+
+
+class SpriteSink:
+    """
+    Shelf packing: images go left to right along a row as long as they fit
+    the sheet's width, the next row starts below the tallest one, and a
+    full sheet is saved and a new one started. An image bigger than a
+    sheet gets a sheet of its own. A sheet is as big as what is on it.
+    """
+    # Called when a full sheet was saved, before the next image is placed
+    on_flush = None
+
+    def __init__(self, prefix, sheet_size=DEFAULT_SHEET_SIZE, resume_at=None):
+        self.path = self.prefix = prefix
+        self.sheet_size = sheet_size
+        self.index_path = prefix + ".jsonl"
+        self.sheet = 1
+        self.position = resume_at or 0
+        if resume_at is None:
+            self._index = open(self.index_path, 'wb')
+        else:
+            self._index = open_at(self.index_path, resume_at)
+            self._index.seek(0)
+            last = None
+            for line in self._index:
+                last = line
+            if last is not None:
+                # Sheets after the last indexed one are written again
+                self.sheet = int(json.loads(last)["sheet"][len(os.path.basename(prefix)) + 1:-4]) + 1
+        self._placed = []
+        self.x = self.y = self.row_height = 0
+
+    def sheet_path(self, sheet):
+        return f"{self.prefix}_{sheet:04d}.png"
+
+    @property
+    def pending(self):
+        """Images not on a saved sheet yet."""
+        return len(self._placed)
+
+    def add(self, number, output_name, image, data):
+        from PIL import Image
+        image = Image.open(io.BytesIO(image))
+        image.load()
+        width, height = image.size
+        oversized = width > self.sheet_size or height > self.sheet_size
+        if self.x + width > self.sheet_size:
+            self.x, self.y, self.row_height = 0, self.y + self.row_height, 0
+        if self._placed and (oversized or self.y + height > self.sheet_size):
+            self.flush()
+            if self.on_flush:
+                self.on_flush()
+        self._placed.append((image, self.x, self.y, {"line": number, "name": output_name, "data": data}))
+        self.x += width
+        self.row_height = max(self.row_height, height)
+        if oversized:
+            self.flush()
+
+    def flush(self):
+        """Save the current sheet and its index entries, and start a new sheet."""
+        if not self._placed:
+            return
+        from PIL import Image
+        modes = {image.mode for image, _, _, _ in self._placed}
+        if modes == {"1"}:
+            mode, background = "1", 1
+        elif modes & {"RGBA", "LA", "PA"} or any("transparency" in image.info for image, _, _, _ in self._placed):
+            mode, background = "RGBA", (0, 0, 0, 0)
+        else:
+            mode, background = "RGB", (255, 255, 255)
+        width = max(x + image.size[0] for image, x, _, _ in self._placed)
+        height = max(y + image.size[1] for image, _, y, _ in self._placed)
+        sheet = Image.new(mode, (width, height), background)
+        for image, x, y, _ in self._placed:
+            sheet.paste(image, (x, y))
+        path = self.sheet_path(self.sheet)
+        with open(path + ".tmp", 'wb') as file:
+            sheet.save(file, format="PNG")
+            sync(file)
+        os.replace(path + ".tmp", path)
+        # Index entries only once their sheet is on disk
+        name = os.path.basename(path)
+        for image, x, y, entry in self._placed:
+            entry.update(sheet=name, x=x, y=y, width=image.size[0], height=image.size[1])
+            self._index.write((json.dumps(entry) + "\n").encode())
+        self._index.flush()
+        self.sheet += 1
+        self._placed = []
+        self.x = self.y = self.row_height = 0
+
+    def commit(self):
+        """Sync the index of the saved sheets; returns its size."""
+        if not self._index.closed:
+            sync(self._index)
+            self.position = self._index.tell()
+        return self.position
+
+    def close(self):
+        try:
+            self.flush()
+            self.commit()
+        finally:
+            self._index.close()
+
+
+def open_sink(archive=None, sprites=None, sheet_size=DEFAULT_SHEET_SIZE, resume_at=None):
+    """
+    Return the sink of --archive or --sprites, or None for one file per image.
+    resume_at is a position commit() returned: the sink continues there.
+    """
+    if sprites:
+        return SpriteSink(sprites, sheet_size, resume_at)
+    if not archive:
+        return None
+    lower = archive.lower()
+    if lower.endswith(".zip"):
+        return ZipSink(archive, resume_at)
+    if lower.endswith(tuple(TAR_EXTENSIONS)):
+        return TarSink(archive, resume_at)
+    raise ValueError(f"unknown archive type of {archive} (use .zip, {', '.join(TAR_EXTENSIONS)})")
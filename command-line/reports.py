@@ -0,0 +1,95 @@
+import re
+
+from orderstore import MONTHS, day_rollup, iter_orders, list_days
+from rollups import DayRollup
+
+# Day specs accepted by --from/--to: "2Jun", "Jun2", "2 Jun", "Jun-2" or a
+# bare month ("Jun") meaning the whole month. Day files carry no year, so
+# a whole year is simply --from Jan --to Dec.
+DAY_SPEC_RE = re.compile(
+    r"^\s*(?:(?P<d1>\d{1,2})[\s/-]*(?P<m1>[A-Za-z]{3})|(?P<m2>[A-Za-z]{3})[\s/-]*(?P<d2>\d{1,2})?)\s*$")
+
+
+def parse_day_spec(spec, end=False):
+    """
+    Parse a --from/--to value into (month index, day).
+
+    A bare month starts on day 1, or runs to day 31 when used as the end
+    of a range. Raises ValueError for anything else.
+    """
+    match = DAY_SPEC_RE.match(spec)
+    if not match:
+        raise ValueError(f"Invalid date: {spec!r} (use e.g. 2Jun, Jun2 or Jun)")
+    month = (match.group("m1") or match.group("m2")).capitalize()
+    day = match.group("d1") or match.group("d2")
+    if month not in MONTHS:
+        raise ValueError(f"Invalid month: {month!r}")
+    if day is None:
+        day = 31 if end else 1
+    day = int(day)
+    if not 1 <= day <= 31:
+        raise ValueError(f"Invalid day: {day}")
+    return MONTHS.index(month), day
+
+
+def days_in_range(start, end):
+    """
+    Return the saved (month, date) days between two parsed specs, inclusive.
+
+    A range whose start lies after its end wraps over the new year,
+    e.g. --from Nov --to Feb.
+    """
+    days = []
+    for month, date in list_days():
+        key = (MONTHS.index(month), int(date))
+        if start <= end:
+            inside = start <= key <= end
+        else:
+            inside = key >= start or key <= end
+        if inside:
+            days.append((month, date))
+    if start > end:
+        days.sort(key=lambda day: (MONTHS.index(day[0]) < start[0], MONTHS.index(day[0]), int(day[1])))
+    return days
+
+
+def iter_range_orders(days):
+    """Yield (date, month, order) one record at a time across several days."""
+    for month, date in days:
+        for order in iter_orders(date, month):
+            yield date, month, order
+
+
+class RangeSummary(DayRollup):
+    """Rollup of one or more days, with a printable summary."""
+
+    def __init__(self):
+        super().__init__()
+        self.days = 0
+
+    def lines(self):
+        """Return the summary as printable text lines."""
+        lines = [
+            f"Days with orders: {self.days}",
+            f"Total Orders: {self.orders}",
+            f"Total Revenue: ${self.revenue:.2f}",
+            "",
+            "Hour   Orders   Revenue",
+        ]
+        for hour in range(24):
+            if self.hourly_orders[hour]:
+                lines.append(f"{hour:02d}:00  {self.hourly_orders[hour]:6d}  ${self.hourly_revenue[hour]:9.2f}")
+        if self.items:
+            lines += ["", "Item                  Quantity"]
+            for item, quantity in sorted(self.items.items(), key=lambda entry: -entry[1]):
+                lines.append(f"{item[:20]:20}  {quantity:8d}")
+        return lines
+
+
+def summarize_range(days):
+    """Combine the stored rollups of the given days, without reading any order."""
+    summary = RangeSummary()
+    summary.days = len(days)
+    for month, date in days:
+        summary.merge(day_rollup(date, month))
+    return summary
@@ -0,0 +1,67 @@
+from orders import decode_order
+
+
+class DayRollup:
+    """
+    Running totals for a day: order count, revenue, quantity per item and
+    an hourly histogram. Orders are added one at a time as they are saved,
+    and rollups of several days can be merged, so reading a summary never
+    needs the orders themselves.
+    """
+
+    def __init__(self):
+        self.orders = 0
+        self.revenue = 0.0
+        self.items = {}
+        self.hourly_orders = [0] * 24
+        self.hourly_revenue = [0.0] * 24
+
+    def add(self, order):
+        """Count one order, given as an Order or in either stored layout."""
+        order = decode_order(order)
+        self.orders += 1
+        self.revenue += order.bill
+        for item in order.items:
+            self.items[item.item] = self.items.get(item.item, 0) + item.quantity
+        hour = order.hour
+        if hour is not None:
+            self.hourly_orders[hour] += 1
+            self.hourly_revenue[hour] += order.bill
+
+    def merge(self, other):
+        self.orders += other.orders
+        self.revenue += other.revenue
+        for item, quantity in other.items.items():
+            self.items[item] = self.items.get(item, 0) + quantity
+        for hour in range(24):
+            self.hourly_orders[hour] += other.hourly_orders[hour]
+            self.hourly_revenue[hour] += other.hourly_revenue[hour]
+
+    def to_dict(self):
+        return {
+            "Orders": self.orders,
+            "Revenue": round(self.revenue, 2),
+            "Items": self.items,
+            "Hourly_orders": self.hourly_orders,
+            "Hourly_revenue": [round(revenue, 2) for revenue in self.hourly_revenue],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rollup = cls()
+        rollup.orders = data["Orders"]
+        rollup.revenue = data["Revenue"]
+        rollup.items = dict(data["Items"])
+        rollup.hourly_orders = list(data["Hourly_orders"])
+        rollup.hourly_revenue = list(data["Hourly_revenue"])
+        return rollup
+
+    @classmethod
+    def from_orders(cls, orders):
+        rollup = cls()
+        for order in orders:
+            rollup.add(order)
+        return rollup
+
+    def __eq__(self, other):
+        return isinstance(other, DayRollup) and self.to_dict() == other.to_dict()
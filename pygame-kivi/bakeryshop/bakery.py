@@ -1,9 +1,11 @@
-import time
-from random import randint
-import pandas as pd
 import json
+import time
 import os
-import matplotlib.pyplot as plt
+import sys
+import threading
+import queue
+from collections import OrderedDict
+from functools import partial
 from datetime import datetime
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
@@ -18,33 +20,34 @@ from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
 from kivy.core.window import Window
 from kivy.graphics import Color, Rectangle
 from kivy.uix.spinner import Spinner
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.metrics import dp
+from kivy.clock import Clock
+from kivy.logger import Logger
 
-# Attempt to import FPDF, but provide a fallback if not available
-try:
-    from fpdf import FPDF
-    HAS_FPDF = True
-except ImportError:
-    print("Warning: fpdf module not found. PDF export will be disabled.")
-    print("To enable PDF export, install fpdf: pip install fpdf")
-    HAS_FPDF = False
+# Order storage is shared with the command-line bakery tool
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'command-line'))
+from orderids import new_order_id
+from orderstore import (append_order, append_orders, day_exists, day_signature, find_orders, iter_orders, list_days,
+                        read_orders, signature_after_save)
+from pdfreport import OrderReport
+from reports import days_in_range, parse_day_spec
+from analytics import CHARTS, report_lines, sales_report
+from menu import BAKERY_ITEMS
+from orders import SCHEMA_KIVY, decode_order
 
 # Set window size and color
 Window.size = (900, 700)
 Window.clearcolor = (0.95, 0.95, 0.95, 1)
 
-BAKERY_ITEMS = {
-    "Bread": 2.50,
-    "Croissant": 1.75,
-    "Donut": 1.25,
-    "Cake Slice": 3.50,
-    "Muffin": 1.50,
-    "Cupcake": 2.00,
-    "Cookie": 1.00,
-    "Brownie": 2.25,
-    "Coffee": 2.50,
-    "Tea": 1.75
-}
+# Orders handed from the fetch thread to the UI per frame
+FETCH_CHUNK_SIZE = 200
+# Parsed days kept in memory by the app
+DAY_CACHE_SIZE = 8
+# Orders that could not be saved, one {"date", "month", "order"} per line
+UNSAVED_FILE = 'BakeryShop.unsaved.jsonl'
 
 def get_current_date_time():
     current_time = time.asctime(time.localtime(time.time()))
@@ -54,9 +57,8 @@ def get_current_date_time():
     order_time = current_time[11:19]
     return date, month, year, order_time
 
-def save_order_to_json(customer_name, customer_id, order_items, bill, order_time, date, month):
-    filename = f"BakeryShop{month}{date}.json"
-    order_data = {
+def build_order_data(customer_name, customer_id, order_items, bill, order_time, date, month):
+    return {
         "Customer_name": customer_name,
         "Customer_id": customer_id,
         "Order_items": order_items,
@@ -64,32 +66,14 @@ def save_order_to_json(customer_name, customer_id, order_items, bill, order_time
         "Time": order_time,
         "Date": f"{date} {month}"
     }
-    
-    if os.path.exists(filename):
-        with open(filename, 'r') as file:
-            try:
-                data = json.load(file)
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
-
-    data.append(order_data)
 
-    with open(filename, 'w') as file:
-        json.dump(data, file, indent=4)
+def save_order_to_json(customer_name, customer_id, order_items, bill, order_time, date, month):
+    order_data = build_order_data(customer_name, customer_id, order_items, bill, order_time, date, month)
+    append_order(order_data, date, month)
+    return order_data
 
 def read_orders_from_json(date, month):
-    filename = f"BakeryShop{month}{date}.json"
-    if os.path.exists(filename):
-        with open(filename, 'r') as file:
-            try:
-                data = json.load(file)
-                return data
-            except json.JSONDecodeError:
-                return []
-    else:
-        return []
+    return read_orders(date, month)
 
 class OrderItem(BoxLayout):
     def __init__(self, item_name, price, **kwargs):
@@ -133,10 +117,246 @@ class OrderItem(BoxLayout):
             "total": self.get_total()
         }
 
+class OrderRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    One row of the order history. Only enough rows to fill the screen are
+    created; RecycleView rebinds them to other orders while scrolling.
+    """
+    def __init__(self, **kwargs):
+        super(OrderRow, self).__init__(orientation='vertical', padding=dp(8), spacing=dp(2), **kwargs)
+        self.index = 0
+        with self.canvas.before:
+            Color(0.9, 0.9, 0.9)
+            self.background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self.update_background, size=self.update_background)
+        
+        # Order header
+        header = BoxLayout(orientation='horizontal')
+        self.customer_label = Label(size_hint_x=0.5, color=(0, 0, 0, 1))
+        self.id_label = Label(size_hint_x=0.3, color=(0, 0, 0, 1))
+        self.time_label = Label(size_hint_x=0.2, color=(0, 0, 0, 1))
+        header.add_widget(self.customer_label)
+        header.add_widget(self.id_label)
+        header.add_widget(self.time_label)
+        self.add_widget(header)
+        
+        # Order footer
+        footer = BoxLayout(orientation='horizontal')
+        self.summary_label = Label(size_hint_x=0.45, color=(0, 0, 0, 1), shorten=True)
+        self.summary_label.bind(width=lambda label, width: setattr(label, 'text_size', (width, None)))
+        self.total_label = Label(size_hint_x=0.25, color=(0, 0, 0, 1))
+        view_details = Button(text='View Details', size_hint_x=0.3)
+        view_details.bind(on_press=lambda x: App.get_running_app().show_order_details(self.index))
+        footer.add_widget(self.summary_label)
+        footer.add_widget(self.total_label)
+        footer.add_widget(view_details)
+        self.add_widget(footer)
+    
+    def update_background(self, *args):
+        self.background.pos = self.pos
+        self.background.size = self.size
+    
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.customer_label.text = f"Customer: {data['customer']}"
+        self.id_label.text = f"ID: {data['order_id']}"
+        self.time_label.text = f"Time: {data['time']}"
+        self.summary_label.text = data['summary']
+        self.total_label.text = f"Total: ${data['total']}"
+        return super(OrderRow, self).refresh_view_attrs(rv, index, {})
+
+def order_row(order):
+    """Return the few fields an OrderRow shows; the items are only listed in the details popup."""
+    if order.schema == SCHEMA_KIVY:
+        count = sum(item.quantity for item in order.items)
+        summary = f"{count} item{'s' if count != 1 else ''}"
+    else:
+        summary = order.description
+    return {
+        'customer': order.customer_name,
+        'order_id': order.customer_id,
+        'time': order.time,
+        'total': f"{order.bill:.2f}",
+        'summary': summary,
+    }
+
+class DayCache:
+    """
+    Bounded LRU cache of parsed days, shared by the views of the app.
+
+    An entry is only served while the mtime and size of the day's files
+    are unchanged, so orders saved by another terminal are picked up on
+    the next read. Orders saved by this app are added to the cached day
+    instead. Safe to use from worker threads: a cached day is a tuple that
+    is replaced, never changed, when orders are added, so a reader can go
+    through it while the order writer saves.
+    """
+    def __init__(self, max_days=DAY_CACHE_SIZE):
+        self.max_days = max_days
+        self.hits = 0
+        self.misses = 0
+        self._days = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, date, month):
+        """Return the cached orders of a day as a tuple, or None if it is missing or stale."""
+        key = (str(date), month)
+        signature = day_signature(date, month)
+        with self._lock:
+            entry = self._days.get(key)
+            # A day with no local files (nothing saved yet, or kept by an
+            # order server) cannot be validated and is always read afresh
+            if entry is not None and signature and entry[0] == signature:
+                self._days.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._days.pop(key, None)
+            self.misses += 1
+            return None
+    
+    def put(self, date, month, signature, orders):
+        """Cache a day read while its files matched ``signature`` (taken before reading)."""
+        with self._lock:
+            self._days[(str(date), month)] = (signature, tuple(orders))
+            self._days.move_to_end((str(date), month))
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+    
+    def load(self, date, month):
+        """Return the orders of a day, reading them only on a cache miss."""
+        orders = self.get(date, month)
+        if orders is None:
+            signature = day_signature(date, month)
+            orders = tuple(decode_order(data) for data in iter_orders(date, month))
+            self.put(date, month, signature, orders)
+        return orders
+    
+    def record_save(self, date, month, orders, before):
+        """
+        Add orders this app just saved (as order data) to their cached day.
+        ``before`` is the day signature taken right before saving; if the
+        cached copy was already stale by then, or the day's files grew by
+        more than these orders (another till saved at the same time), it
+        is dropped instead.
+        """
+        key = (str(date), month)
+        with self._lock:
+            entry = self._days.get(key)
+            if entry is None:
+                return
+            after = signature_after_save(before, date, month, orders) if entry[0] == before else None
+            if after is None:
+                del self._days[key]
+                return
+            self._days[key] = (after, entry[1] + tuple(decode_order(order_data) for order_data in orders))
+    
+    def discard(self, date, month):
+        with self._lock:
+            self._days.pop((str(date), month), None)
+    
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "days": len(self._days)}
+
+class OrderWriter:
+    """
+    Saves orders on a background thread so the till never waits for disk.
+
+    Orders are queued in the order they were taken; whatever has queued up
+    while a save runs is written as the next batch. Failed batches are kept
+    in UNSAVED_FILE and reported through ``on_error(orders, error)`` on the
+    UI thread, or only logged once close() was called, since the UI does
+    not run any more then. close() writes everything still queued before
+    returning.
+    """
+    def __init__(self, day_cache, on_error):
+        self.day_cache = day_cache
+        self.on_error = on_error
+        self.closing = False
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='order-writer', daemon=True)
+        self.thread.start()
+    
+    def submit(self, order_data, date, month):
+        self.queue.put((order_data, date, month))
+    
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            records = [record for record in batch if record is not None]
+            if records:
+                # Whatever goes wrong, the writer must live on for the next orders
+                try:
+                    self.write(records)
+                except Exception as e:
+                    self.batch_failed(records, e)
+            if stop:
+                return
+    
+    def write(self, records):
+        days = {}
+        for order_data, date, month in records:
+            days.setdefault((date, month), []).append(order_data)
+        saved = False
+        try:
+            # The first save opens the store, which may fail too
+            before = {day: day_signature(*day) for day in days}
+            append_orders(records)
+            saved = True
+            # Keep the cached days current
+            for (date, month), orders in days.items():
+                self.day_cache.record_save(date, month, orders, before[(date, month)])
+        except Exception as e:
+            if not saved:
+                self.batch_failed(records, e)
+                return
+            Logger.error(f"OrderWriter: orders saved, but their cached days could not be updated: {e}")
+            for date, month in days:
+                self.day_cache.discard(date, month)
+    
+    def batch_failed(self, records, error):
+        self.keep_unsaved(records, error)
+        if not self.closing:
+            orders = [order_data for order_data, _, _ in records]
+            Clock.schedule_once(partial(self.report_error, orders, error))
+    
+    def keep_unsaved(self, records, error):
+        """Write orders that failed to save to UNSAVED_FILE, or at least to the log."""
+        Logger.error(f"OrderWriter: failed to save {len(records)} order(s): {error}")
+        try:
+            with open(UNSAVED_FILE, 'a') as file:
+                for order_data, date, month in records:
+                    file.write(json.dumps({"date": date, "month": month, "order": order_data}) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            Logger.error(f"OrderWriter: the orders were kept in {UNSAVED_FILE}")
+        except (OSError, TypeError, ValueError) as e:
+            Logger.error(f"OrderWriter: could not write {UNSAVED_FILE} either ({e}), the orders were:")
+            for order_data, date, month in records:
+                Logger.error(f"OrderWriter: {date} {month} {order_data!r}")
+    
+    def report_error(self, orders, error, dt):
+        self.on_error(orders, error)
+    
+    def close(self):
+        """Flush every queued order and stop the writer thread."""
+        self.closing = True
+        self.queue.put(None)
+        self.thread.join()
+
 class BakeryShopApp(App):
     def build(self):
         self.title = 'Bakery Shop Management'
         self.order_items = []
+        self.analytics_report = ''
+        self.day_cache = DayCache()
+        self.order_writer = OrderWriter(self.day_cache, self.save_failed)
         
         # Main layout with tabs
         self.tabbed_panel = TabbedPanel(do_default_tab=False)
@@ -247,27 +467,84 @@ class BakeryShopApp(App):
         fetch_button.bind(on_press=self.fetch_orders)
         view_buttons.add_widget(fetch_button)
         
-        if HAS_FPDF:
-            pdf_button = Button(text='Save as PDF', background_color=(0.2, 0.3, 0.8, 1))
-            pdf_button.bind(on_press=self.save_data_as_pdf)
-            view_buttons.add_widget(pdf_button)
+        pdf_button = Button(text='Save as PDF', background_color=(0.2, 0.3, 0.8, 1))
+        pdf_button.bind(on_press=self.save_data_as_pdf)
+        view_buttons.add_widget(pdf_button)
         
         view_layout.add_widget(view_buttons)
         
+        # Search by order ID or customer name, through the lookup index
+        # (within the selected month, if one is picked)
+        search_bar = BoxLayout(orientation='horizontal', spacing=dp(10), size_hint_y=0.08)
+        self.search_input = TextInput(hint_text='Order ID or customer name', multiline=False, size_hint_x=0.7)
+        self.search_input.bind(on_text_validate=self.search_orders)
+        search_bar.add_widget(self.search_input)
+        search_button = Button(text='Search', size_hint_x=0.3)
+        search_button.bind(on_press=self.search_orders)
+        search_bar.add_widget(search_button)
+        view_layout.add_widget(search_bar)
+        
         # Orders Display
         view_layout.add_widget(Label(text='Order History', font_size=dp(18), size_hint_y=0.05))
         
-        self.order_scroll = ScrollView(size_hint_y=0.7)
-        self.orders_layout = GridLayout(cols=1, spacing=dp(5), size_hint_y=None)
-        self.orders_layout.bind(minimum_height=self.orders_layout.setter('height'))
-        self.order_scroll.add_widget(self.orders_layout)
-        
-        view_layout.add_widget(self.order_scroll)
+        self.orders_status = Label(text='', size_hint_y=0.05)
+        view_layout.add_widget(self.orders_status)
+        
+        # Virtualised list: rows are recycled while scrolling instead of
+        # building widgets for every order up front
+        self.orders = []
+        self.fetch_generation = 0
+        self.orders_view = RecycleView(size_hint_y=0.57)
+        self.orders_view.viewclass = OrderRow
+        orders_layout = RecycleBoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None,
+                                         default_size=(None, dp(70)), default_size_hint=(1, None))
+        orders_layout.bind(minimum_height=orders_layout.setter('height'))
+        self.orders_view.add_widget(orders_layout)
+        
+        view_layout.add_widget(self.orders_view)
         view_tab.add_widget(view_layout)
         
+        # Analytics Tab
+        analytics_tab = TabbedPanelItem(text='Analytics')
+        analytics_layout = BoxLayout(orientation='vertical', padding=dp(15), spacing=dp(10))
+        
+        # Range Selection (both empty means every saved day)
+        range_selection = GridLayout(cols=4, spacing=dp(10), size_hint_y=0.08)
+        range_selection.add_widget(Label(text='From:', halign='right'))
+        self.range_from_input = TextInput(hint_text='e.g., 1Jun or Jun', multiline=False)
+        range_selection.add_widget(self.range_from_input)
+        range_selection.add_widget(Label(text='To:', halign='right'))
+        self.range_to_input = TextInput(hint_text='e.g., 30Jun', multiline=False)
+        range_selection.add_widget(self.range_to_input)
+        analytics_layout.add_widget(range_selection)
+        
+        analytics_buttons = BoxLayout(orientation='horizontal', spacing=dp(10), size_hint_y=0.08)
+        analytics_button = Button(text='Show Analytics', background_color=(0.2, 0.6, 0.2, 1))
+        analytics_button.bind(on_press=self.show_analytics)
+        analytics_buttons.add_widget(analytics_button)
+        
+        details_button = Button(text='Show Tables', background_color=(0.2, 0.3, 0.8, 1))
+        details_button.bind(on_press=lambda x: self.show_popup(
+            'Sales Analytics', self.analytics_report or 'Press Show Analytics first'))
+        analytics_buttons.add_widget(details_button)
+        analytics_layout.add_widget(analytics_buttons)
+        
+        # Charts Display
+        self.analytics_summary = Label(text='', size_hint_y=0.06)
+        analytics_layout.add_widget(self.analytics_summary)
+        
+        charts_grid = GridLayout(cols=2, spacing=dp(5), size_hint_y=0.78)
+        self.chart_images = {}
+        for name in CHARTS:
+            self.chart_images[name] = Image(allow_stretch=True)
+            charts_grid.add_widget(self.chart_images[name])
+        analytics_layout.add_widget(charts_grid)
+        analytics_tab.add_widget(analytics_layout)
+        
         # Add tabs to the panel
         self.tabbed_panel.add_widget(order_tab)
         self.tabbed_panel.add_widget(view_tab)
+        self.tabbed_panel.add_widget(analytics_tab)
         
         return self.tabbed_panel
 
@@ -315,14 +592,15 @@ class BakeryShopApp(App):
             if quantity > 0:
                 order_details.append(order_item.get_item_info())
         
-        # Generate unique customer ID
-        customer_id = f"CUST-{randint(1000, 9999)}"
+        # Time-ordered ID, unique across tills
+        customer_id = new_order_id()
         
         # Get current date and time
         date, month, year, order_time = get_current_date_time()
         
-        # Save order to JSON
-        save_order_to_json(
+        # Queue the order for the background writer; the receipt does not
+        # wait for the disk
+        order_data = build_order_data(
             customer_name, 
             customer_id, 
             order_details, 
@@ -331,8 +609,9 @@ class BakeryShopApp(App):
             date, 
             month
         )
+        self.order_writer.submit(order_data, date, month)
         
-        # Show success popup with receipt
+        # Show the receipt; a failed save is reported separately
         receipt_text = f"Customer: {customer_name}\n"
         receipt_text += f"Order ID: {customer_id}\n"
         receipt_text += f"Date: {date} {month} {year}\n"
@@ -347,6 +626,15 @@ class BakeryShopApp(App):
         # Clear the form
         self.clear_form(None)
     
+    def save_failed(self, orders, error):
+        customers = ", ".join(str(order['Customer_name']) for order in orders)
+        self.show_popup('Error', f'Failed to save {len(orders)} order(s) for: {customers}\n{error}\n'
+                                 f'They were kept in {UNSAVED_FILE}')
+    
+    def on_stop(self):
+        # No queued order may be lost when the window closes
+        self.order_writer.close()
+    
     def show_receipt(self, receipt_text):
         popup_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
         title_label = Label(text="Order Receipt", font_size=dp(18), size_hint_y=0.1)
@@ -364,7 +652,7 @@ class BakeryShopApp(App):
         buttons_layout.add_widget(close_button)
         popup_layout.add_widget(buttons_layout)
         
-        popup = Popup(title='Order Saved Successfully', content=popup_layout, size_hint=(0.8, 0.8))
+        popup = Popup(title='Receipt', content=popup_layout, size_hint=(0.8, 0.8))
         close_button.bind(on_press=popup.dismiss)
         print_button.bind(on_press=lambda x: self.print_receipt(receipt_text, popup))
         popup.open()
@@ -385,84 +673,116 @@ class BakeryShopApp(App):
             self.show_popup('Error', 'Please select a date and month')
             return
         
-        data = read_orders_from_json(date, month)
-        self.display_orders(data)
+        # Every fetch gets a new generation; a worker whose generation is no
+        # longer current stops, and its pending chunks are dropped
+        self.fetch_generation += 1
+        self.orders = []
+        self.orders_view.data = []
+        self.orders_view.scroll_y = 1
+        self.orders_status.text = 'Loading orders...'
+        threading.Thread(target=self.load_orders, args=(date, month, self.fetch_generation),
+                         daemon=True).start()
     
-    def display_orders(self, orders):
-        self.orders_layout.clear_widgets()
-        
-        if not orders:
-            no_orders = Label(text='No orders found for the selected date', size_hint_y=None, height=dp(40))
-            self.orders_layout.add_widget(no_orders)
+    def load_orders(self, date, month, generation):
+        # Runs on a worker thread: parse the day and hand the orders to the UI
+        # in chunks, so rows appear while the rest of the file is still read.
+        # The row data is prepared here too, leaving the UI thread only the list update.
+        orders, rows = [], []
+        day = []
+        try:
+            cached = self.day_cache.get(date, month)
+            signature = day_signature(date, month)
+            for order in (cached if cached is not None else iter_orders(date, month)):
+                if generation != self.fetch_generation:
+                    return
+                order = decode_order(order)
+                orders.append(order)
+                rows.append(order_row(order))
+                day.append(order)
+                if len(orders) >= FETCH_CHUNK_SIZE:
+                    Clock.schedule_once(partial(self.add_orders, generation, orders, rows, False))
+                    orders, rows = [], []
+        except Exception as e:
+            Clock.schedule_once(partial(self.fetch_failed, generation, str(e)))
             return
-        
-        for order in orders:
-            # Create order display
-            order_box = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(5), 
-                                size_hint_y=None, height=dp(200))
-            with order_box.canvas.before:
-                Color(0.95, 0.95, 0.95)
-                Rectangle(pos=order_box.pos, size=order_box.size)
-            
-            # Order header
-            header = BoxLayout(orientation='horizontal', size_hint_y=0.2)
-            header.add_widget(Label(text=f"Customer: {order['Customer_name']}", size_hint_x=0.5))
-            header.add_widget(Label(text=f"ID: {order['Customer_id']}", size_hint_x=0.3))
-            header.add_widget(Label(text=f"Time: {order['Time']}", size_hint_x=0.2))
-            order_box.add_widget(header)
-            
-            # Order items
-            items_scroll = ScrollView(size_hint_y=0.6)
-            items_layout = BoxLayout(orientation='vertical', size_hint_y=None)
-            items_layout.bind(minimum_height=items_layout.setter('height'))
-            
-            if 'Order_items' in order and isinstance(order['Order_items'], list):
-                for item in order['Order_items']:
-                    item_text = f"{item['item']} x{item['quantity']} - ${item['total']:.2f}"
-                    item_label = Label(text=item_text, size_hint_y=None, height=dp(30))
-                    items_layout.add_widget(item_label)
-            else:
-                # For backward compatibility with older order formats
-                items_layout.add_widget(Label(text=str(order.get('Order', 'Unknown')), size_hint_y=None, height=dp(30)))
-            
-            items_scroll.add_widget(items_layout)
-            order_box.add_widget(items_scroll)
-            
-            # Order footer
-            footer = BoxLayout(orientation='horizontal', size_hint_y=0.2)
-            footer.add_widget(Label(text=f"Total: ${order.get('Total_bill', order.get('Bill', '0.00'))}", size_hint_x=0.7))
-            view_details = Button(text='View Details', size_hint_x=0.3)
-            view_details.bind(on_press=lambda x, o=order: self.show_order_details(o))
-            footer.add_widget(view_details)
-            order_box.add_widget(footer)
-            
-            self.orders_layout.add_widget(order_box)
+        if cached is None:
+            self.day_cache.put(date, month, signature, day)
+        Clock.schedule_once(partial(self.add_orders, generation, orders, rows, True))
     
-    def show_order_details(self, order):
-        # Create a detailed view of the order
-        order_text = f"Customer: {order['Customer_name']}\n"
-        order_text += f"Order ID: {order['Customer_id']}\n"
-        order_text += f"Date: {order.get('Date', 'Unknown')}\n"
-        order_text += f"Time: {order['Time']}\n\n"
-        
-        # Show items if available in new format
-        if 'Order_items' in order and isinstance(order['Order_items'], list):
+    def search_orders(self, instance):
+        query = self.search_input.text.strip()
+        if not query:
+            self.show_popup('Error', 'Please enter an order ID or a customer name')
+            return
+        month = self.month_input.text if self.month_input.text != 'Select Month' else None
+        
+        self.fetch_generation += 1
+        self.orders = []
+        self.orders_view.data = []
+        self.orders_view.scroll_y = 1
+        self.orders_status.text = 'Searching...'
+        threading.Thread(target=self.find_matches, args=(query, month, self.fetch_generation),
+                         daemon=True).start()
+    
+    def find_matches(self, query, month, generation):
+        # Runs on a worker thread, like load_orders; an ID is tried first,
+        # then the same text as a customer name
+        orders, rows = [], []
+        try:
+            found = find_orders(customer_id=query, month=month) or find_orders(name=query, month=month)
+        except Exception as e:
+            Clock.schedule_once(partial(self.fetch_failed, generation, str(e)))
+            return
+        for order_month, date, order in found:
+            order = decode_order(order)
+            # CLI orders do not store their day; the details popup shows it
+            order.date = order.date or f"{date} {order_month}"
+            row = order_row(order)
+            row['summary'] = f"{date} {order_month} - {row['summary']}"
+            orders.append(order)
+            rows.append(row)
+        Clock.schedule_once(partial(self.add_orders, generation, orders, rows, True))
+    
+    def add_orders(self, generation, orders, rows, done, dt):
+        if generation != self.fetch_generation:
+            return
+        self.orders.extend(orders)
+        self.orders_view.data.extend(rows)
+        if not done:
+            self.orders_status.text = f"Loading orders... {len(self.orders)}"
+        elif self.orders:
+            stats = self.day_cache.stats()
+            self.orders_status.text = (f"{len(self.orders)} orders "
+                                       f"(day cache: {stats['hits']} hits, {stats['misses']} misses)")
+        else:
+            self.orders_status.text = 'No orders found'
+    
+    def fetch_failed(self, generation, message, dt):
+        if generation != self.fetch_generation:
+            return
+        self.orders_status.text = ''
+        self.show_popup('Error', f'Failed to load orders: {message}')
+    
+    def show_order_details(self, index):
+        # Create a detailed view of the order, only when it is asked for
+        order = self.orders[index]
+        order_text = f"Customer: {order.customer_name}\n"
+        order_text += f"Order ID: {order.customer_id}\n"
+        order_text += f"Date: {order.date or 'Unknown'}\n"
+        order_text += f"Time: {order.time}\n\n"
+        
+        if order.schema == SCHEMA_KIVY:
             order_text += "Items Ordered:\n"
-            for item in order['Order_items']:
-                order_text += f"• {item['item']} x{item['quantity']} - ${item['total']:.2f}\n"
+            for item in order.items:
+                order_text += f"• {item.item} x{item.quantity} - ${item.total:.2f}\n"
         else:
-            # For backward compatibility
-            order_text += f"Order: {order.get('Order', 'Unknown')}\n"
+            order_text += f"Order: {order.description}\n"
         
-        order_text += f"\nTotal: ${order.get('Total_bill', order.get('Bill', '0.00'))}"
+        order_text += f"\nTotal: ${order.bill:.2f}"
         
         self.show_popup('Order Details', order_text)
     
     def save_data_as_pdf(self, instance):
-        if not HAS_FPDF:
-            self.show_popup('Error', 'PDF export is not available. Please install the fpdf module.')
-            return
-        
         date = self.date_input.text
         month = self.month_input.text
         
@@ -470,59 +790,55 @@ class BakeryShopApp(App):
             self.show_popup('Error', 'Please select a date and month')
             return
         
-        data = read_orders_from_json(date, month)
-        
-        if not data:
+        if not day_exists(date, month):
             self.show_popup('Error', 'No orders found for the selected date')
             return
         
         try:
-            # Create PDF
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Title
-            pdf.set_font("Arial", 'B', 16)
-            pdf.cell(0, 10, f"Sweet Delights Bakery - Orders for {date} {month}", 0, 1, 'C')
-            
-            # Date and time
-            pdf.set_font("Arial", '', 10)
-            pdf.cell(0, 10, f"Report generated on: {datetime.now().strftime('%d %b %Y, %H:%M:%S')}", 0, 1, 'R')
-            
-            pdf.ln(5)
-            
-            # Table header
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(50, 10, "Customer", 1, 0, 'C')
-            pdf.cell(40, 10, "Order ID", 1, 0, 'C')
-            pdf.cell(40, 10, "Time", 1, 0, 'C')
-            pdf.cell(60, 10, "Total Amount", 1, 1, 'C')
+            report = OrderReport(
+                f"Sweet Delights Bakery - Orders for {date} {month}",
+                subtitle=f"Report generated on: {datetime.now().strftime('%d %b %Y, %H:%M:%S')}"
+            )
             
-            # Table data
-            pdf.set_font("Arial", '', 10)
-            for order in data:
-                pdf.cell(50, 10, str(order['Customer_name']), 1, 0, 'L')
-                pdf.cell(40, 10, str(order['Customer_id']), 1, 0, 'C')
-                pdf.cell(40, 10, str(order['Time']), 1, 0, 'C')
-                pdf.cell(60, 10, f"${order.get('Total_bill', order.get('Bill', '0.00'))}", 1, 1, 'R')
-            
-            # Summary
-            pdf.ln(10)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 10, f"Total Orders: {len(data)}", 0, 1)
-            
-            # Calculate total revenue
-            total_revenue = sum(float(order.get('Total_bill', order.get('Bill', 0))) for order in data)
-            pdf.cell(0, 10, f"Total Revenue: ${total_revenue:.2f}", 0, 1)
-            
-            # Save the PDF
+            # The day is usually cached already from viewing it
             filename = f"BakeryShop{month}{date}.pdf"
-            pdf.output(filename)
+            report.write(self.day_cache.load(date, month), filename, days=1)
             self.show_popup('Success', f'Data saved as PDF: {filename}')
             
         except Exception as e:
             self.show_popup('Error', f'Failed to generate PDF: {str(e)}')
     
+    def show_analytics(self, instance):
+        range_from = self.range_from_input.text.strip()
+        range_to = self.range_to_input.text.strip()
+        
+        try:
+            if range_from:
+                days = days_in_range(parse_day_spec(range_from),
+                                     parse_day_spec(range_to or range_from, end=True))
+            else:
+                days = list_days()
+        except ValueError as e:
+            self.show_popup('Error', str(e))
+            return
+        
+        if not days:
+            self.show_popup('Error', 'No orders found for the selected range')
+            return
+        
+        try:
+            # Charts come from the cache unless the orders changed since
+            report, charts = sales_report(days)
+        except Exception as e:
+            self.show_popup('Error', f'Failed to build analytics: {str(e)}')
+            return
+        
+        self.analytics_summary.text = (f"{len(days)} days, {report['orders']} orders, "
+                                       f"revenue ${report['revenue']:.2f}")
+        for name, path in charts.items():
+            self.chart_images[name].source = path
+        self.analytics_report = "\n".join(report_lines(report))
+    
     def show_popup(self, title, message):
         popup_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
         
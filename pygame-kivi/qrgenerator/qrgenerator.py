@@ -1,4 +1,5 @@
 import os
+import sys
 import random
 import webbrowser
 import io
@@ -22,6 +23,12 @@ from kivy.graphics.texture import Texture
 from kivy.properties import ObjectProperty, StringProperty, NumericProperty
 
 import qrcode
+
+# The image cache and rasteriser are shared with the command-line QR generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'command-line'))
+from qrcache import cache_key, get_cache
+from qrraster import rasterize
+
 try:
     import validators
     HAS_VALIDATORS = True
@@ -36,6 +43,9 @@ logging.basicConfig(
     filename='qrcode_generator.log'
 )
 
+# Pixels per QR module
+BOX_SIZE = 10
+
 class QRWidget(BoxLayout):
     """Main widget for QR code generation and display"""
     qr_image = ObjectProperty(None)
@@ -192,13 +202,8 @@ class QRWidget(BoxLayout):
         # Simple validation if validators module is not available
         return url.startswith(('http://', 'https://'))
     
-    def update_preview(self):
-        """Generate and display QR code preview"""
-        data = self.data_input.text
-        if not data:
-            data = "https://example.com"  # Default value for preview
-        
-        # Get parameters
+    def qr_parameters(self):
+        """Return (size, border, error_correction, fill_color, back_color) from the controls"""
         size = int(self.size_slider.value)
         border = int(self.border_slider.value)
         
@@ -214,28 +219,59 @@ class QRWidget(BoxLayout):
         # Get colors
         fill_color = self.rgb_to_hex(self.fill_color)
         back_color = self.rgb_to_hex(self.bg_color)
+        return size, border, error_correction, fill_color, back_color
+    
+    def make_qr_png(self, data):
+        """
+        Return (PNG bytes, cached file or None) of the QR code for data with
+        the current settings, rendering it only if the image cache misses
+        """
+        size, border, error_correction, fill_color, back_color = self.qr_parameters()
+        cache = get_cache()
+        key = cache_key(data, size, error_correction, border, BOX_SIZE, fill_color, back_color, "png")
+        cached = cache.get(key, "png") if cache else None
+        if cached is not None:
+            try:
+                with open(cached, 'rb') as f:
+                    return f.read(), cached
+            except FileNotFoundError:
+                # Evicted by a batch run since get(); render it again
+                pass
+        # Create QR code
+        qr = qrcode.QRCode(
+            version=size,
+            error_correction=error_correction,
+            box_size=BOX_SIZE,
+            border=border,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        
+        # Create image (drawn with NumPy if it is loaded, see qrraster.py)
+        img = rasterize(qr, fill_color, back_color)
+        if cache is not None:
+            cached = cache.put_image(key, "png", img)
+            try:
+                with open(cached, 'rb') as f:
+                    return f.read(), cached
+            except FileNotFoundError:
+                # Evicted straight away by a batch run
+                pass
+        img_data = io.BytesIO()
+        img.save(img_data, format='PNG')
+        return img_data.getvalue(), None
+    
+    def update_preview(self):
+        """Generate and display QR code preview"""
+        data = self.data_input.text
+        if not data:
+            data = "https://example.com"  # Default value for preview
         
         try:
-            # Create QR code
-            qr = qrcode.QRCode(
-                version=size,
-                error_correction=error_correction,
-                box_size=10,
-                border=border,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Create image
-            img = qr.make_image(fill_color=fill_color, back_color=back_color)
-            
-            # Convert PIL image to Kivy texture
-            img_data = io.BytesIO()
-            img.save(img_data, format='PNG')
-            img_data.seek(0)
+            png, _ = self.make_qr_png(data)
             
             # Create Kivy core image and texture
-            im = CoreImage(io.BytesIO(img_data.read()), ext='png')
+            im = CoreImage(io.BytesIO(png), ext='png')
             texture = im.texture
             
             # Update the image widget
@@ -258,37 +294,17 @@ class QRWidget(BoxLayout):
         num = random.randint(1000, 9999)
         output_name = f"qrimg_{timestamp}_{num}.png"
         
-        # Get parameters
-        size = int(self.size_slider.value)
-        border = int(self.border_slider.value)
-        
-        # Get error correction level
-        ec_map = {
-            "L": qrcode.constants.ERROR_CORRECT_L,
-            "M": qrcode.constants.ERROR_CORRECT_M,
-            "Q": qrcode.constants.ERROR_CORRECT_Q,
-            "H": qrcode.constants.ERROR_CORRECT_H,
-        }
-        error_correction = ec_map.get(self.ec_spinner.text, qrcode.constants.ERROR_CORRECT_H)
-        
-        # Get colors
-        fill_color = self.rgb_to_hex(self.fill_color)
-        back_color = self.rgb_to_hex(self.bg_color)
-        
         try:
-            # Create QR code
-            qr = qrcode.QRCode(
-                version=size,
-                error_correction=error_correction,
-                box_size=10,
-                border=border,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Create image and save
-            img = qr.make_image(fill_color=fill_color, back_color=back_color)
-            img.save(output_name)
+            # The preview has usually put this exact image in the cache already
+            png, cached = self.make_qr_png(data)
+            try:
+                if not cached:
+                    raise FileNotFoundError(output_name)
+                get_cache().export(cached, output_name)
+            except FileNotFoundError:
+                # Not cached, or evicted in the meantime; the bytes are at hand
+                with open(output_name, 'wb') as f:
+                    f.write(png)
             
             logging.info(f"QR code saved as: {output_name}")
             self.show_success(f"QR code saved as: {output_name}")